@@ -4,16 +4,26 @@ Configuration settings for the FastAPI backend
 
 import os
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
 class Settings(BaseSettings):
     """Application settings"""
-    
+
+    # Frozen so attribute reads are cheap slot lookups, the instance is
+    # hashable for caching, and nothing can mutate config at runtime
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        frozen=True
+    )
+
     # Supabase configuration
     supabase_url: str = Field(..., description="Supabase project URL")
     supabase_key: str = Field(..., description="Supabase anon/service key")
     supabase_service_key: Optional[str] = Field(None, description="Supabase service role key")
+    postgres_dsn: Optional[str] = Field(None, description="Direct Postgres DSN for migrations (asyncpg)")
+    redis_url: Optional[str] = Field(None, description="Redis URL for the document read cache")
     
     # AI API configurations
     mistral_api_key: Optional[str] = Field(None, description="Mistral AI API key")
@@ -39,6 +49,7 @@ class Settings(BaseSettings):
     
     # Storage configuration
     upload_directory: str = Field("uploads", description="Directory for temporary file storage")
+    raw_storage_dir: Optional[str] = Field(None, description="Local directory for persisting raw uploads (demo mode when unset)")
     raw_documents_bucket: str = Field("RAW", description="Supabase bucket for raw documents")
     
     # Database settings
@@ -49,9 +60,5 @@ class Settings(BaseSettings):
     environment: str = Field("development", description="Environment (development/production)")
     debug: bool = Field(True, description="Debug mode")
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
-
 # Global settings instance
 settings = Settings()
\ No newline at end of file
@@ -5,15 +5,15 @@ Handles document upload, processing, storage, and chatbot interactions
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import uvicorn
 import os
+from datetime import datetime, timezone
 from typing import List, Optional
 import logging
 from contextlib import asynccontextmanager
 
 from config import settings
-from routers import documents, chat, auth
 from services.supabase_client import get_supabase_client
 from services.document_processor import DocumentProcessor
 
@@ -26,66 +26,62 @@ async def lifespan(app: FastAPI):
     """Application lifespan events - Pre-load heavy imports and initialize services"""
     logger.info("🚀 Starting Paypr MVP Backend with pre-loading...")
     
-    # Pre-load heavy imports and initialize services
+    # Initialize services - heavy AI/ML libraries are lazy-imported by the
+    # services on first use, so startup only pays for what it touches
     try:
-        # Step 1: Pre-load all heavy AI/ML imports
-        logger.info("📦 Pre-loading heavy imports...")
         import time
         start_time = time.time()
-        
-        # Pre-import all ML/AI libraries
-        import PyPDF2
-        import google.generativeai as genai
-        from mistralai import Mistral, DocumentURLChunk
-        from docling.document_converter import DocumentConverter
-        from PIL import Image
-        import pandas as pd
-        import magic
-        from docx import Document as DocxDocument
-        
-        import_time = time.time() - start_time
-        logger.info(f"✅ Heavy imports completed in {import_time:.2f} seconds")
-        
-        # Step 2: Initialize Supabase connection
+
+        # Step 1: Initialize Supabase connection
         logger.info("🗄️  Initializing Supabase connection...")
         supabase = get_supabase_client()
         logger.info("✅ Supabase client initialized successfully")
         
-        # Step 3: Initialize Document Processor with pre-loaded converter
+        # Step 2: Initialize Document Processor
         logger.info("🛠️  Initializing Document Processor...")
         doc_processor = DocumentProcessor()
         logger.info("✅ Document processor initialized successfully")
+
+        # Share the warm instances with request handlers via app.state
+        app.state.doc_processor = doc_processor
+        app.state.advanced_processor = doc_processor.advanced_processor
+        app.state.supabase = supabase
         
-        # Step 4: Pre-initialize DocumentConverter (this is the slow part!)
-        logger.info("📄 Pre-initializing DocumentConverter...")
-        converter_start = time.time()
-        
-        # Access the advanced processor and initialize its converter
-        advanced_processor = doc_processor.advanced_processor
-        if advanced_processor and hasattr(advanced_processor, 'docling_converter'):
-            # Force initialization by accessing the converter
-            _ = advanced_processor.docling_converter
-            converter_time = time.time() - converter_start
-            logger.info(f"✅ DocumentConverter pre-initialized in {converter_time:.2f} seconds")
+        # Warm-up costs seconds of cold boot, so only do it where it pays off:
+        # production keeps warm instances, dev/serverless rely on first-use init
+        if settings.environment == "production" or os.getenv("WARMUP", "0") == "1":
+            # Step 3: Pre-initialize DocumentConverter (this is the slow part!)
+            logger.info("📄 Pre-initializing DocumentConverter...")
+            converter_start = time.time()
+
+            # Access the advanced processor and initialize its converter
+            advanced_processor = doc_processor.advanced_processor
+            if advanced_processor and hasattr(advanced_processor, 'docling_converter'):
+                # Force initialization by accessing the converter
+                _ = advanced_processor.docling_converter
+                converter_time = time.time() - converter_start
+                logger.info(f"✅ DocumentConverter pre-initialized in {converter_time:.2f} seconds")
+            else:
+                logger.warning("⚠️  Could not access DocumentConverter for pre-initialization")
+
+            # Step 4: Pre-initialize AI clients
+            logger.info("🤖 Pre-initializing AI clients...")
+            ai_start = time.time()
+
+            # Initialize Mistral client
+            if hasattr(advanced_processor, 'mistral_client') and advanced_processor.mistral_client:
+                logger.info("✅ Mistral client pre-initialized")
+
+            # Initialize Gemini
+            if hasattr(advanced_processor, '_initialize_clients'):
+                # The initialization already happened in constructor
+                logger.info("✅ Gemini client pre-initialized")
+
+            ai_time = time.time() - ai_start
+            logger.info(f"✅ AI clients pre-initialized in {ai_time:.2f} seconds")
         else:
-            logger.warning("⚠️  Could not access DocumentConverter for pre-initialization")
-        
-        # Step 5: Pre-initialize AI clients
-        logger.info("🤖 Pre-initializing AI clients...")
-        ai_start = time.time()
-        
-        # Initialize Mistral client
-        if hasattr(advanced_processor, 'mistral_client') and advanced_processor.mistral_client:
-            logger.info("✅ Mistral client pre-initialized")
-        
-        # Initialize Gemini
-        if hasattr(advanced_processor, '_initialize_clients'):
-            # The initialization already happened in constructor
-            logger.info("✅ Gemini client pre-initialized")
-        
-        ai_time = time.time() - ai_start
-        logger.info(f"✅ AI clients pre-initialized in {ai_time:.2f} seconds")
-        
+            logger.info("⏩ Skipping converter/AI warm-up (set WARMUP=1 to force)")
+
         total_time = time.time() - start_time
         logger.info(f"🎉 Backend startup completed in {total_time:.2f} seconds")
         logger.info("🚀 Ready for fast document processing!")
@@ -105,19 +101,24 @@ app = FastAPI(
     title="Paypr MVP Backend",
     description="Backend API for Paypr MVP Chat functionality",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
+# Configure CORS - a precompiled origin regex keeps the per-request check a
+# single re.match, and max_age lets browsers cache preflight responses
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for demo
-    allow_credentials=False,  # Set to False when allowing all origins
+    allow_origin_regex=r"https?://(localhost|127\.0\.0\.1|.*\.vercel\.app)(:\d+)?",
+    allow_credentials=False,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    max_age=86400,  # Cache preflight responses for 24h
 )
 
 # Include routers
+from routers import auth, documents, chat
+
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
@@ -144,17 +145,25 @@ async def health_check():
                 "supabase": "connected",
                 "document_processor": "ready"
             },
-            "timestamp": os.popen("date").read().strip()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail="Service unavailable")
 
 if __name__ == "__main__":
+    # Auto-reload only in development; production scales across cores with
+    # multiple workers and the C event loop / HTTP parser implementations
+    reload_flag = settings.environment == "development"
+    workers = 1 if reload_flag else int(os.getenv("UVICORN_WORKERS", os.cpu_count() or 2))
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        reload=reload_flag,
+        workers=workers,
+        log_level="info",
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
@@ -2,21 +2,89 @@
 Chat router for chatbot interactions and conversation management
 """
 
+import asyncio
+import json
 import uuid
 import logging
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends
+from itertools import chain
+from typing import List, Optional, Dict, Any, TypedDict
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+try:
+    from msgspec import json as msgspec_json
+except ImportError:  # msgspec is optional - orjson covers the default path
+    msgspec_json = None
 from pydantic import BaseModel
 from enum import Enum
 
-from services.supabase_client import get_supabase_client
+from services.supabase_client import get_supabase_client, SupabaseService
 from services.advanced_document_processor import AdvancedDocumentProcessor
+from routers import documents as documents_router
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def get_advanced_processor(request: Request) -> AdvancedDocumentProcessor:
+    """Reuse the processor pre-initialized during application lifespan"""
+    return request.app.state.advanced_processor
+
+def _format_history(chat_history: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Convert stored chat interactions to the format expected by chat_with_document"""
+    return list(chain.from_iterable(
+        (
+            {'sender': 'user', 'content': msg.get('user_input', '')},
+            {'sender': 'assistant', 'content': msg.get('model_output', '')}
+        )
+        for msg in chat_history
+        if msg.get('user_input') != 'Chat session started'
+    ))
+
+# Formatted history cache per chat session: chat_id -> (last_interaction_id, formatted)
+# Avoids re-formatting the identical conversation prefix on every turn.
+# LRU-bounded so long-running processes don't accumulate an entry for
+# every chat ever seen; evicted chats just pay one re-format.
+_HISTORY_CACHE_MAX = 128
+_history_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+def _cache_history(chat_id: str, entry: tuple) -> None:
+    """Store a formatted-history entry, evicting the least recently used"""
+    _history_cache[chat_id] = entry
+    _history_cache.move_to_end(chat_id)
+    while len(_history_cache) > _HISTORY_CACHE_MAX:
+        _history_cache.popitem(last=False)
+
+def _get_formatted_history(chat_id: str, chat_history: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Return formatted history for a chat, reusing the cached prefix when unchanged"""
+    tail_id = chat_history[-1].get('id', 0) if chat_history else 0
+    cached = _history_cache.get(chat_id)
+    if cached and cached[0] == tail_id:
+        _history_cache.move_to_end(chat_id)
+        return cached[1]
+
+    formatted_history = _format_history(chat_history)
+    _cache_history(chat_id, (tail_id, formatted_history))
+    return formatted_history
+
+def _seed_history_cache(chat_id: str, recent_history: List[Dict[str, Any]]) -> None:
+    """Seed the formatted-history cache from a trailing window (newest first)
+
+    A one-row window for a chat that's already cached means the insert
+    fallback couldn't fetch the full tail - drop the entry rather than
+    shadow the rest of the conversation with a single exchange.
+    """
+    if len(recent_history) == 1 and chat_id in _history_cache:
+        _history_cache.pop(chat_id, None)
+        return
+    _cache_history(chat_id, (
+        recent_history[0]["id"],
+        _format_history(list(reversed(recent_history)))
+    ))
+
 class DataSource(str, Enum):
     """Data source options for chat"""
     DATABASE = "database"
@@ -29,48 +97,49 @@ class ChatMessage(BaseModel):
     chat_id: Optional[str] = None
     data_source: DataSource = DataSource.DATABASE
 
-class ChatResponse(BaseModel):
-    """Chat response model"""
+# Outbound shapes are TypedDicts rather than Pydantic models: the DB rows
+# already match the contract, so responses skip per-field model validation
+# and go straight through orjson. Only inbound ChatMessage keeps Pydantic.
+class ChatResponse(TypedDict):
+    """Chat response shape"""
     id: int
     chat_id: str
     user_input: str
     model_output: str
     created_at: str
 
-class ChatSession(BaseModel):
-    """Chat session model"""
+class ChatSession(TypedDict):
+    """Chat session shape"""
     chat_id: str
     title: str
     last_message: str
     message_count: int
     preview: str
 
-class ChatHistoryResponse(BaseModel):
-    """Chat history response model"""
+class ChatHistoryResponse(TypedDict):
+    """Chat history response shape"""
     history: List[ChatResponse]
     total: int
 
-class ChatSessionsResponse(BaseModel):
-    """Chat sessions response model"""
+class ChatSessionsResponse(TypedDict):
+    """Chat sessions response shape"""
     sessions: List[ChatSession]
     total: int
 
-class NewChatResponse(BaseModel):
-    """New chat session response model"""
+class NewChatResponse(TypedDict):
+    """New chat session response shape"""
     chat_id: str
     message: str
 
-@router.post("/new", response_model=NewChatResponse)
-async def create_new_chat():
+@router.post("/new")
+async def create_new_chat(supabase: SupabaseService = Depends(get_supabase_client)):
     """
     Create a new chat session
-    
+
     Returns:
         New chat session ID and welcome message
     """
     try:
-        supabase = get_supabase_client()
-        
         # Create new chat session
         new_session = await supabase.create_new_chat_session()
         
@@ -88,25 +157,26 @@ async def create_new_chat():
             detail="Failed to create new chat session"
         )
 
-@router.post("/message", response_model=ChatResponse)
+@router.post("/message")
 async def send_message(
     message: ChatMessage,
-    user_id: str = "demo_user"  # For demo purposes
+    user_id: str = "demo_user",  # For demo purposes
+    advanced_processor: AdvancedDocumentProcessor = Depends(get_advanced_processor),
+    supabase: SupabaseService = Depends(get_supabase_client)
 ):
     """
     Send a chat message and get AI response
-    
+
     Args:
         message: Chat message content, chat_id, and data source
         user_id: User identifier
-    
+        advanced_processor: Shared processor instance from app state
+        supabase: Shared Supabase service instance
+
     Returns:
         AI response and saves interaction to chat_history
     """
     try:
-        supabase = get_supabase_client()
-        advanced_processor = AdvancedDocumentProcessor()
-        
         # Validate chat_id
         if not message.chat_id:
             raise HTTPException(
@@ -114,43 +184,47 @@ async def send_message(
                 detail="chat_id is required. Create a new chat session first."
             )
         
-        logger.info(f"Processing message for chat {message.chat_id}: {message.content[:50]}...")
-        
-        # Get chat history for context
-        chat_history = await supabase.get_chat_history(chat_id=message.chat_id, limit=10)
-        
+        # One structured log is emitted at the end of the handler instead of
+        # several per-step infos, each of which costs a lock + format + emit
+        doc_source = "none"
+
+        # Fetch chat history and documents concurrently when both are needed,
+        # so the two independent Supabase round-trips overlap instead of
+        # serializing on the request
+        needs_documents = message.data_source in (DataSource.UPLOADED, DataSource.BOTH)
+        if needs_documents:
+            chat_history, db_documents = await asyncio.gather(
+                supabase.get_chat_history(chat_id=message.chat_id, limit=10),
+                supabase.get_documents(user_id, require_markdown=True),
+                return_exceptions=True
+            )
+            if isinstance(chat_history, BaseException):
+                raise chat_history
+        else:
+            # DATABASE mode answers with a canned response that never reads
+            # history - skip the Supabase round-trip entirely
+            chat_history = []
+
         # Generate AI response based on data source
-        if message.data_source == DataSource.UPLOADED or message.data_source == DataSource.BOTH:
+        if needs_documents:
             # Try to get documents from database first
             try:
-                db_documents = await supabase.get_documents(user_id)
-                
+                if isinstance(db_documents, BaseException):
+                    raise db_documents
+
                 # Find a document with consolidated_markdown (text-based PDF)
-                text_document = None
-                for doc in db_documents:
-                    if doc.get("consolidated_markdown"):
-                        text_document = doc
-                        break
-                
+                text_document = next((doc for doc in db_documents if doc.get("consolidated_markdown")), None)
+
                 if text_document:
                     consolidated_markdown = text_document["consolidated_markdown"]
                     filename = text_document["name"]
-                    
-                    logger.info(f"Found database document: {filename}, content length: {len(consolidated_markdown)}")
-                    
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Found database document: {filename}, content length: {len(consolidated_markdown)}")
+
                     # Convert chat history to the format expected by chat_with_document
-                    formatted_history = []
-                    for msg in chat_history:
-                        if msg.get('user_input') != 'Chat session started':
-                            formatted_history.append({
-                                'sender': 'user',
-                                'content': msg.get('user_input', '')
-                            })
-                            formatted_history.append({
-                                'sender': 'assistant', 
-                                'content': msg.get('model_output', '')
-                            })
-                    
+                    formatted_history = _get_formatted_history(message.chat_id, chat_history)
+
                     # Generate response using document content with history
                     ai_response_content = await advanced_processor.chat_with_document(
                         user_message=message.content,
@@ -158,38 +232,29 @@ async def send_message(
                         filename=filename,
                         chat_history=formatted_history
                     )
-                    
-                    logger.info("Generated AI response using database document content")
+
+                    doc_source = "database"
                 else:
-                    logger.info("No text-based documents with consolidated_markdown found in database")
                     ai_response_content = "Please upload a text-based PDF document first to enable AI-powered document chat. Image-based PDFs don't support detailed text queries."
                     
             except Exception as db_error:
                 logger.warning(f"Database document retrieval failed: {db_error}")
                 
-                # Fallback to demo document content
-                from routers.documents import _demo_document_content
-                
-                if _demo_document_content and _demo_document_content.get("consolidated_markdown"):
-                    consolidated_markdown = _demo_document_content["consolidated_markdown"]
-                    filename = _demo_document_content["filename"]
-                    processing_method = _demo_document_content.get("processing_method", "unknown")
-                    
-                    logger.info(f"Fallback to demo document: {filename}, content length: {len(consolidated_markdown)}, method: {processing_method}")
-                    
+                # Fallback to demo document content - read through the module
+                # imported at load time instead of re-importing per request
+                demo_document = await documents_router._demo_latest(user_id)
+
+                if demo_document and demo_document.get("consolidated_markdown"):
+                    consolidated_markdown = demo_document["consolidated_markdown"]
+                    filename = demo_document["filename"]
+                    processing_method = demo_document.get("processing_method", "unknown")
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Fallback to demo document: {filename}, content length: {len(consolidated_markdown)}, method: {processing_method}")
+
                     # Convert chat history to the format expected by chat_with_document
-                    formatted_history = []
-                    for msg in chat_history:
-                        if msg.get('user_input') != 'Chat session started':
-                            formatted_history.append({
-                                'sender': 'user',
-                                'content': msg.get('user_input', '')
-                            })
-                            formatted_history.append({
-                                'sender': 'assistant', 
-                                'content': msg.get('model_output', '')
-                            })
-                    
+                    formatted_history = _get_formatted_history(message.chat_id, chat_history)
+
                     # Generate response using document content with history
                     ai_response_content = await advanced_processor.chat_with_document(
                         user_message=message.content,
@@ -198,7 +263,7 @@ async def send_message(
                         chat_history=formatted_history
                     )
                     
-                    logger.info("Generated AI response using fallback document content")
+                    doc_source = "fallback"
                 else:
                     logger.warning("No document content found in database or fallback")
                     ai_response_content = "Please upload a PDF document first to enable AI-powered document chat."
@@ -206,15 +271,27 @@ async def send_message(
             # Database or fallback response
             ai_response_content = f"I'm ready to help! I can chat with your uploaded documents once you upload a PDF file. Your question: '{message.content}' will be answered using the document content."
         
-        # Save the chat interaction to chat_history table with chat_id
-        saved_interaction = await supabase.save_chat_interaction(
+        # Save the interaction and fetch the trailing history window in a
+        # single Supabase round-trip
+        recent_history = await supabase.append_and_return_recent(
+            chat_id=message.chat_id,
             user_input=message.content,
             model_output=ai_response_content,
-            chat_id=message.chat_id
+            limit=10
         )
-        
-        logger.info("Chat interaction saved successfully")
-        
+        saved_interaction = recent_history[0]  # newest row first
+
+        # Single consolidated log for the whole request
+        logger.info(
+            f"chat_message_processed chat_id={message.chat_id} doc_source={doc_source} "
+            f"content_len={len(message.content)} response_len={len(ai_response_content)} "
+            f"saved_id={saved_interaction['id']}"
+        )
+
+        # Seed the formatted-history cache with the returned window so the
+        # next turn reuses it without re-formatting
+        _seed_history_cache(message.chat_id, recent_history)
+
         return ChatResponse(
             id=saved_interaction["id"],
             chat_id=saved_interaction["chat_id"],
@@ -230,17 +307,103 @@ async def send_message(
             detail=f"Failed to process chat message: {str(e)}"
         )
 
-@router.get("/sessions", response_model=ChatSessionsResponse)
-async def get_chat_sessions():
+async def _resolve_chat_document(supabase: SupabaseService, user_id: str) -> Optional[Dict[str, str]]:
+    """Find document content to chat against: database first, then demo fallback"""
+    try:
+        db_documents = await supabase.get_documents(user_id, require_markdown=True)
+        text_document = next((doc for doc in db_documents if doc.get("consolidated_markdown")), None)
+        if text_document:
+            return {
+                "consolidated_markdown": text_document["consolidated_markdown"],
+                "filename": text_document["name"]
+            }
+    except Exception as db_error:
+        logger.warning(f"Database document retrieval failed: {db_error}")
+
+    demo = await documents_router._demo_latest(user_id)
+    if demo and demo.get("consolidated_markdown"):
+        return {
+            "consolidated_markdown": demo["consolidated_markdown"],
+            "filename": demo["filename"]
+        }
+
+    return None
+
+@router.post("/message/stream")
+async def send_message_stream(
+    message: ChatMessage,
+    user_id: str = "demo_user",  # For demo purposes
+    advanced_processor: AdvancedDocumentProcessor = Depends(get_advanced_processor),
+    supabase: SupabaseService = Depends(get_supabase_client)
+):
+    """
+    Send a chat message and stream the AI response as server-sent events
+
+    Tokens are emitted as they arrive from the model, so time-to-first-byte
+    is the model's first-token latency instead of full generation time. The
+    complete interaction is saved to chat_history once the stream finishes.
+    """
+    if not message.chat_id:
+        raise HTTPException(
+            status_code=400,
+            detail="chat_id is required. Create a new chat session first."
+        )
+
+    chat_history = await supabase.get_chat_history(chat_id=message.chat_id, limit=10)
+    document = await _resolve_chat_document(supabase, user_id)
+
+    # Tokens accumulate here; persistence happens in a background task after
+    # the response ends, so a client disconnect (which cancels the generator)
+    # still saves whatever was streamed before the connection dropped
+    response_parts = []
+
+    async def event_stream():
+        if document:
+            formatted_history = _get_formatted_history(message.chat_id, chat_history)
+            async for token in advanced_processor.chat_with_document_stream(
+                user_message=message.content,
+                consolidated_markdown=document["consolidated_markdown"],
+                filename=document["filename"],
+                chat_history=formatted_history
+            ):
+                response_parts.append(token)
+                yield f"data: {json.dumps(token)}\n\n"
+        else:
+            fallback = "Please upload a PDF document first to enable AI-powered document chat."
+            response_parts.append(fallback)
+            yield f"data: {json.dumps(fallback)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def persist_transcript():
+        full_response = ''.join(response_parts)
+        if not full_response:
+            return
+        try:
+            recent_history = await supabase.append_and_return_recent(
+                chat_id=message.chat_id,
+                user_input=message.content,
+                model_output=full_response,
+                limit=10
+            )
+            _seed_history_cache(message.chat_id, recent_history)
+        except Exception as e:
+            logger.error(f"Failed to save streamed chat interaction: {e}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        background=BackgroundTask(persist_transcript)
+    )
+
+@router.get("/sessions")
+async def get_chat_sessions(supabase: SupabaseService = Depends(get_supabase_client)):
     """
     Get list of chat sessions for sidebar
-    
+
     Returns:
         List of chat sessions with metadata
     """
     try:
-        supabase = get_supabase_client()
-        
         # Get chat sessions
         sessions_data = await supabase.get_chat_sessions(limit=20)
         
@@ -268,43 +431,52 @@ async def get_chat_sessions():
             detail="Failed to retrieve chat sessions"
         )
 
-@router.get("/history/{chat_id}", response_model=ChatHistoryResponse)
+@router.get("/history/{chat_id}")
 async def get_chat_history(
     chat_id: str,
-    limit: int = 50
+    limit: int = 50,
+    after: Optional[str] = None,
+    supabase: SupabaseService = Depends(get_supabase_client)
 ):
     """
     Get chat history for a specific chat session
-    
+
     Args:
         chat_id: Chat session ID
         limit: Maximum number of chat interactions to return
-    
+        after: Keyset cursor - created_at of the last row already received;
+            only rows newer than it are returned
+        supabase: Shared Supabase service instance
+
     Returns:
-        List of chat interactions for the session
+        List of chat interactions for the session plus a next_cursor to
+        pass back as `after` for the following page
     """
     try:
-        supabase = get_supabase_client()
-        
         # Get chat history for specific session
-        history_data = await supabase.get_chat_history(chat_id=chat_id, limit=limit)
-        
-        # Convert to response format
-        chat_responses = [
-            ChatResponse(
-                id=item["id"],
-                chat_id=item["chat_id"],
-                user_input=item["user_input"],
-                model_output=item["model_output"],
-                created_at=item["created_at"]
-            )
-            for item in history_data
-        ]
-        
-        return ChatHistoryResponse(
-            history=chat_responses,
-            total=len(chat_responses)
-        )
+        history_data = await supabase.get_chat_history(chat_id=chat_id, limit=limit, after=after)
+
+        # The DB rows already match the response schema - serialize them
+        # directly (msgspec if installed, orjson otherwise) instead of
+        # re-validating through Pydantic
+        payload = {
+            "history": [
+                {
+                    "id": item["id"],
+                    "chat_id": item["chat_id"],
+                    "user_input": item["user_input"],
+                    "model_output": item["model_output"],
+                    "created_at": item["created_at"]
+                }
+                for item in history_data
+            ],
+            "total": len(history_data),
+            "next_cursor": history_data[-1]["created_at"] if history_data else None
+        }
+
+        if msgspec_json is not None:
+            return Response(content=msgspec_json.encode(payload), media_type="application/json")
+        return ORJSONResponse(payload)
         
     except Exception as e:
         logger.error(f"Failed to get chat history for session {chat_id}: {e}")
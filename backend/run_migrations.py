@@ -4,61 +4,77 @@ Script to run Supabase migrations manually
 """
 
 import asyncio
-import os
 from pathlib import Path
-from services.supabase_client import get_supabase_client
 
-async def run_migrations():
-    """Run all migration files in order"""
+from config import settings
+
+async def _read_migration(path: Path):
+    """Read one migration file without blocking the event loop"""
     try:
-        supabase = get_supabase_client()
-        print("Connected to Supabase successfully")
-        
-        # Get migration files in order
-        migrations_dir = Path(__file__).parent / "supabase" / "migrations"
-        migration_files = sorted(migrations_dir.glob("*.sql"))
-        
-        print(f"Found {len(migration_files)} migration files:")
-        for migration in migration_files:
-            print(f"  - {migration.name}")
-        
-        for migration_file in migration_files:
-            print(f"\n📁 Running migration: {migration_file.name}")
-            
-            # Read migration SQL
-            with open(migration_file, 'r') as f:
-                sql_content = f.read()
-            
-            print(f"📄 SQL Content preview (first 200 chars):")
-            print(f"   {sql_content[:200]}...")
-            
-            try:
-                # Execute the SQL - Note: Supabase Python client doesn't support raw SQL
-                # We need to use the Supabase SQL editor or run this via psql
-                print(f"⚠️  Cannot execute raw SQL via Python client")
-                print(f"   Please run this SQL manually in Supabase SQL Editor:")
-                print(f"   {migration_file}")
-                print()
-                
-            except Exception as e:
-                print(f"❌ Failed to run migration {migration_file.name}: {e}")
-                return False
-        
-        print("✅ Migration script completed!")
-        print("\n🔧 Next steps:")
-        print("1. Go to your Supabase dashboard")
-        print("2. Navigate to SQL Editor")
-        print("3. Run each migration file manually in order:")
+        import aiofiles
+        async with aiofiles.open(path, "r") as f:
+            return path, await f.read()
+    except ImportError:
+        return path, path.read_text()
+
+async def run_migrations():
+    """Run all migration files in order over a single database connection"""
+    migrations_dir = Path(__file__).parent / "supabase" / "migrations"
+    migration_files = sorted(migrations_dir.glob("*.sql"))
+
+    print(f"Found {len(migration_files)} migration files:")
+    for migration in migration_files:
+        print(f"  - {migration.name}")
+
+    if not settings.postgres_dsn:
+        print("\n⚠️  POSTGRES_DSN not configured - cannot execute SQL directly")
+        print("🔧 Either set POSTGRES_DSN in .env, or run each migration")
+        print("   manually in the Supabase SQL Editor in order:")
         for migration in migration_files:
             print(f"   - {migration.name}")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Migration failed: {e}")
         return False
 
+    import asyncpg
+
+    # Overlap the file reads with connection setup: all migrations load
+    # concurrently while the Postgres handshake is in flight
+    read_task = asyncio.gather(*(_read_migration(p) for p in migration_files))
+
+    # statement_cache_size=0 is required for Supavisor/pgbouncer compatibility
+    conn = await asyncpg.connect(settings.postgres_dsn, statement_cache_size=0)
+    print("Connected to Postgres successfully")
+
+    # gather preserves argument order, so execution order stays sorted
+    migrations = await read_task
+
+    failed = []
+    try:
+        # One connection and one transaction for the whole batch; a savepoint
+        # per file so a broken migration doesn't abort the others
+        async with conn.transaction():
+            for migration_file, sql_content in migrations:
+                print(f"\n📁 Running migration: {migration_file.name}")
+
+                await conn.execute("SAVEPOINT migration_file")
+                try:
+                    await conn.execute(sql_content)
+                    await conn.execute("RELEASE SAVEPOINT migration_file")
+                    print(f"✅ {migration_file.name} applied")
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO SAVEPOINT migration_file")
+                    print(f"❌ Failed to run migration {migration_file.name}: {e}")
+                    failed.append(migration_file.name)
+    finally:
+        await conn.close()
+
+    if failed:
+        print(f"\n⚠️  {len(failed)} migration(s) failed: {', '.join(failed)}")
+        return False
+
+    print("\n✅ All migrations applied successfully!")
+    return True
+
 if __name__ == "__main__":
     success = asyncio.run(run_migrations())
     if not success:
-        exit(1)
\ No newline at end of file
+        exit(1)
@@ -3,46 +3,413 @@ Advanced document processing service using Docling, Mistral OCR, and Gemini
 """
 
 import os
+import re
 import json
+import hashlib
 import logging
-import tempfile
 import asyncio
+import importlib
+import random
+import threading
+import time
+import tempfile
+from datetime import timedelta
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 import aiofiles
-from mistralai import Mistral, DocumentURLChunk
-from docling.document_converter import DocumentConverter
-import google.generativeai as genai
+import aiofiles.os
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Heavy AI/ML dependencies (mistralai, docling, google.generativeai, ...) are
+# imported on first use instead of at module load, so importing this module
+# stays cheap for endpoints that never touch the document pipeline.
+_import_cache: Dict[str, Any] = {}
+
+def _lazy_import(name: str) -> Any:
+    """Import a heavy dependency on first access and cache the module"""
+    module = _import_cache.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+        _import_cache[name] = module
+    return module
+
+# Dedicated pool for blocking document-parsing work (Docling conversion,
+# PDF slicing), sized via DOCLING_CONCURRENCY. Keeping this off the default
+# executor stops long conversions from starving other to_thread users.
+_DOCLING_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DOCLING_CONCURRENCY", os.cpu_count() or 2)),
+    thread_name_prefix="docling"
+)
+
+# Raw pypdfium2 calls are confined to this process pool: PDFium is not
+# thread-safe even across distinct documents, and Docling already drives it
+# from the conversion threads above, so touching pdfium from another thread
+# in this process risks intermittent native crashes. Worker processes are
+# single-threaded, so each has pdfium to itself. Spawns lazily on first use.
+_PDF_POOL_WORKERS = min(os.cpu_count() or 1, 6)
+_pdf_page_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pdf_page_pool() -> ProcessPoolExecutor:
+    """Create the pdfium worker pool on first use"""
+    global _pdf_page_pool
+    if _pdf_page_pool is None:
+        import multiprocessing
+        # The server process already runs threads (executor pools, the
+        # event loop) by the time this pool spawns, so fork - Linux's
+        # default - could deadlock a worker on a lock a thread held at
+        # fork time. forkserver forks from a clean helper process instead;
+        # platforms without it (Windows) use spawn.
+        try:
+            ctx = multiprocessing.get_context("forkserver")
+        except ValueError:
+            ctx = multiprocessing.get_context("spawn")
+        _pdf_page_pool = ProcessPoolExecutor(max_workers=_PDF_POOL_WORKERS, mp_context=ctx)
+    return _pdf_page_pool
+
+# Strips all whitespace in one C-level pass when measuring text density
+_WS_STRIP = str.maketrans('', '', ' \t\n\r\f\v')
+
+def _scan_pdf_structure(pdf_path) -> bool:
+    """Blocking pdfium scan backing the early image-PDF detection
+
+    Module-level so it pickles into the pdfium worker pool.
+    """
+    # pypdfium2 ships with Docling, so this adds no new dependency and
+    # is considerably faster than PyPDF2's pure-Python text extraction
+    pdfium = _lazy_import('pypdfium2')
+    pdfium_c = _lazy_import('pypdfium2.raw')
+
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        total_pages = len(pdf)
+        # Check first few pages for text content
+        pages_to_check = min(3, total_pages)  # Check first 3 pages or all if less
+        total_text_length = 0
+        total_images = 0
+
+        for page_num in range(pages_to_check):
+            page = pdf[page_num]
+
+            # Extract text from page
+            try:
+                page_text = page.get_textpage().get_text_range()
+                # Clean text and count meaningful characters
+                clean_text = page_text.translate(_WS_STRIP)
+                total_text_length += len(clean_text)
+
+                # Count image objects on the page (filtered at the C level)
+                total_images += sum(
+                    1 for _ in page.get_objects(
+                        filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)
+                    )
+                )
+
+                # Once text already clears the higher 100 chars/page
+                # threshold, no image count can flip the verdict - stop
+                if total_text_length >= pages_to_check * 100:
+                    break
+
+            except Exception as e:
+                logger.warning(f"Error analyzing page {page_num}: {e}")
+                continue
+
+        # Calculate metrics
+        avg_text_per_page = total_text_length / pages_to_check if pages_to_check > 0 else 0
+        avg_images_per_page = total_images / pages_to_check if pages_to_check > 0 else 0
+
+        # Thresholds for image-heavy detection
+        MIN_TEXT_PER_PAGE = 50  # Less than 50 meaningful characters per page
+        MIN_IMAGE_RATIO = 0.5   # At least 0.5 images per page
+
+        is_image_heavy = (
+            avg_text_per_page < MIN_TEXT_PER_PAGE or
+            (avg_images_per_page >= MIN_IMAGE_RATIO and avg_text_per_page < 100)
+        )
+
+        logger.info(f"Early detection results: "
+                  f"avg_text_per_page={avg_text_per_page:.1f}, "
+                  f"avg_images_per_page={avg_images_per_page:.1f}, "
+                  f"total_pages={total_pages}, "
+                  f"is_image_heavy={is_image_heavy}")
+
+        return is_image_heavy
+    finally:
+        pdf.close()
+
+# Cap on concurrent Gemini requests when consolidation fans out per page
+_GEMINI_SEM = asyncio.Semaphore(int(os.getenv("GEMINI_CONCURRENCY", "8")))
+
+# Image-heavy PDFs are sliced into page groups of this size so Gemini
+# analyzes them concurrently instead of in one long serial request
+_IMAGE_PDF_CHUNK_PAGES = int(os.getenv("IMAGE_PDF_CHUNK_PAGES", "5"))
+
+class _TokenBucket:
+    """Minimal async token bucket: `rate` units refill over `period` seconds.
+
+    Smooths request bursts under the provider quota instead of letting them
+    all hit the API at once and 429 together.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self._rate = rate
+        self._period = period
+        self._level = rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` units of capacity are available, then consume them"""
+        amount = min(amount, self._rate)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._level = min(
+                    self._rate,
+                    self._level + (now - self._updated) * self._rate / self._period
+                )
+                self._updated = now
+                if self._level >= amount:
+                    self._level -= amount
+                    return
+                await asyncio.sleep(
+                    (amount - self._level) * self._period / self._rate
+                )
+
+# Gemini quota buckets (defaults sit just under the free-tier 100 RPM / 30K
+# TPM limits). Token spend is estimated at ~4 characters per token.
+_GEMINI_RPM = _TokenBucket(float(os.getenv("GEMINI_RPM", "90")))
+_GEMINI_TPM = _TokenBucket(float(os.getenv("GEMINI_TPM", "27000")))
+
+async def _acquire_gemini_quota(prompt_chars: int):
+    """Reserve request + estimated token capacity before a Gemini call"""
+    await _GEMINI_RPM.acquire()
+    await _GEMINI_TPM.acquire(max(1, prompt_chars // 4))
+
+# Page boundaries as emitted by the Mistral extraction ("# Page N" headings)
+_PAGE_HEADING_RE = re.compile(r'^# Page \d+\s*$', re.MULTILINE)
+
+# Transient failures from the AI providers (rate limits, overload, timeouts)
+# are retried with exponential backoff; anything else fails fast
+_TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+_TRANSIENT_NAMES = (
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "TooManyRequests"
+)
+
+def _is_transient(exc: BaseException) -> bool:
+    """Whether an API error is worth retrying"""
+    if isinstance(exc, TimeoutError):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in _TRANSIENT_STATUS:
+        return True
+    return type(exc).__name__ in _TRANSIENT_NAMES
+
+async def _retry_async(func, *args, description: str = "API call", attempts: int = 5, **kwargs):
+    """Await func with exponential backoff + jitter on transient errors"""
+    delay = 1.0
+    for attempt in range(1, attempts + 1):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts or not _is_transient(e):
+                raise
+            sleep_for = min(delay, 30.0) * (0.5 + random.random())
+            logger.warning(
+                f"⚠ Transient error in {description} "
+                f"(attempt {attempt}/{attempts}), retrying in {sleep_for:.1f}s: {e}"
+            )
+            await asyncio.sleep(sleep_for)
+            delay *= 2
+
+# Completed pipeline results keyed by (content digest, model name) - an
+# identical PDF re-uploaded within this worker's lifetime skips every
+# extraction and API call. The document_fingerprints table is the persistent
+# cross-worker layer; this is the zero-round-trip one.
+_RESULT_CACHE_MAX = 32
+_result_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+def _cache_result(key: tuple, result: Dict[str, Any]):
+    """Remember a successful pipeline result, evicting the oldest over capacity"""
+    _result_cache[key] = result
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > _RESULT_CACHE_MAX:
+        _result_cache.popitem(last=False)
+
+# Document-scoped Gemini models keyed by (document digest, model name).
+# Only the immutable part is cached - the model bound to a server-side
+# context cache (or the seeded document exchange) - so each turn sends the
+# new user message instead of re-serializing the whole document. Live
+# ChatSession objects are never shared: their internal history is mutable
+# conversation state, and one per document would leak turns between chats.
+# Each entry carries a rebuild deadline: the server-side context cache
+# expires after _CONTEXT_CACHE_TTL, and a model still pointing at an
+# expired cache fails every send, so the entry is rebuilt a margin early.
+_CHAT_MODEL_MAX = 16
+_CONTEXT_CACHE_TTL = timedelta(hours=1)
+_CONTEXT_CACHE_REFRESH_MARGIN = 120  # seconds before TTL to rebuild
+_chat_model_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Static prompt boilerplate hoisted to module constants. Each template is a
+# couple of KB of fixed text; building it once and filling only the dynamic
+# fields with format_map avoids re-interpolating it on every request.
+_CONSOLIDATION_TMPL = """
+You are an expert document analyst. I have extracted markdown content from the same PDF document "{filename}" using two different methods:
+
+1. **Docling Extraction**:
+```markdown
+{docling_markdown}
+```
+
+2. **Mistral OCR Extraction**:
+```markdown
+{mistral_markdown}
+```
+
+**Task**: Create a single, consolidated markdown that combines the best information from both extractions.
+
+**Chain of Thought Process**:
+1. Analyze both markdowns to identify overlapping content
+2. Identify unique information present in only one extraction
+3. Remove duplicate information while preserving all unique content
+4. Maintain proper markdown structure and formatting
+5. Ensure the consolidated version is comprehensive and well-organized
+
+**Instructions**:
+- These are two markdown representations of the same document
+- There will be duplicate information between them
+- One extraction might contain information missing from the other
+- Combine them intelligently to create the most complete version
+- Remove redundant/duplicate content
+- Preserve proper markdown formatting
+- Maintain logical document structure
+
+**Output**: Return only the consolidated markdown content, no explanations.
+"""
+
+_CHAT_SYSTEM_TMPL = """
+You are an intelligent document assistant specializing in analyzing and discussing document content.
+
+**Document Context**: You are chatting about the document "{filename}".
+
+**Document Content**:
+```markdown
+{consolidated_markdown}
+```
+
+**System Instructions**:
+1. **Primary Focus**: Always prioritize information from the document content provided above
+2. **Document Summarization**: When asked about the document or for an overview, provide a comprehensive summary
+3. **Accuracy**: Base all responses strictly on the document content
+4. **Specificity**: Reference specific sections, data points, or details from the document
+5. **Clarity**: If information isn't in the document, clearly state "This information is not available in the document"
+6. **Context Awareness**: Maintain conversation context from previous messages
+7. **Helpfulness**: Provide detailed, useful responses that help users understand the document
+"""
+
+_IMAGE_PDF_TMPL = """
+You are an expert document analyst processing an image-heavy PDF document "{filename}".
+
+**Primary Task**: Analyze this PDF document and provide a comprehensive summary.
+
+**Instructions**:
+1. **Summarize the document**: Extract and summarize all key information, content, and insights from this PDF
+2. **Be comprehensive**: Include all important details, data, figures, charts, diagrams, and text content
+3. **Structure your response**: Organize the summary in a clear, logical format using markdown
+4. **Extract everything**: Don't miss any important information - this will be used for future conversations about the document
+5. **Be detailed**: Provide enough detail so that someone reading your summary would understand the document's complete content
+
+**Output Format**:
+# Document Summary: {filename}
+
+## Overview
+[Brief overview of what this document is about]
+
+## Key Content
+[Detailed summary of all important content, organized by sections/topics]
+
+## Important Data/Figures
+[Any numerical data, charts, graphs, or important figures]
+
+## Conclusions/Key Takeaways
+[Main conclusions or key points from the document]
+
+**Note**: This summary will be used for AI-powered conversations about the document content, so be thorough and accurate.
+"""
+
 class AdvancedDocumentProcessor:
     """Advanced document processor with AI integration"""
-    
+
     def __init__(self):
         self.mistral_client = None
-        self.docling_converter = None
+        self._docling_converter = None
+        self._docling_lock = threading.Lock()
+        self._gemini_model = None
+        self._http_client = None
         self._initialize_clients()
-    
+
+    @property
+    def docling_converter(self):
+        """Docling converter, constructed on first access
+
+        Importing docling and building DocumentConverter costs seconds of
+        cold start, so it stays untouched until a conversion (or the
+        WARMUP path in the application lifespan) actually needs it. The
+        property is resolved from _DOCLING_POOL threads, so first-time
+        construction is locked - concurrent first conversions would each
+        pay the multi-second build and discard all but one instance.
+        """
+        if self._docling_converter is None:
+            with self._docling_lock:
+                if self._docling_converter is None:
+                    docling = _lazy_import('docling.document_converter')
+                    self._docling_converter = docling.DocumentConverter()
+                    logger.info("Docling converter initialized successfully")
+        return self._docling_converter
+
     def _initialize_clients(self):
         """Initialize AI clients"""
         try:
             # Initialize Mistral client
             if settings.mistral_api_key:
-                self.mistral_client = Mistral(api_key=settings.mistral_api_key)
+                mistralai = _lazy_import('mistralai')
+                httpx = _lazy_import('httpx')
+                # One pooled connection set shared across all Mistral calls,
+                # so TLS handshakes amortize over in-flight requests instead
+                # of being renegotiated per call
+                self._http_client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(60.0, connect=10.0),
+                    limits=httpx.Limits(
+                        max_keepalive_connections=50,
+                        max_connections=100
+                    )
+                )
+                self.mistral_client = mistralai.Mistral(
+                    api_key=settings.mistral_api_key,
+                    async_client=self._http_client
+                )
                 logger.info("Mistral client initialized successfully")
             else:
                 logger.warning("Mistral API key not provided")
-            
-            # Initialize Docling converter
-            self.docling_converter = DocumentConverter()
-            logger.info("Docling converter initialized successfully")
-            
+
+            # The Docling converter is built lazily by the docling_converter
+            # property - constructing it here would pay the docling import
+            # and model setup on every boot, warm-up gate or not
+
             # Initialize Gemini
             if settings.google_api_key:
+                genai = _lazy_import('google.generativeai')
                 genai.configure(api_key=settings.google_api_key)
+                # One shared model instance - the constructor re-parses model
+                # config on every call, so build it once
+                self._gemini_model = genai.GenerativeModel(settings.gemini_model_name)
                 logger.info("Gemini client initialized successfully")
             else:
                 logger.warning("Google API key not provided")
@@ -66,10 +433,21 @@ class AdvancedDocumentProcessor:
         """
         try:
             logger.info(f"Starting advanced PDF processing for: {filename}")
-            
-            # Create temporary file for processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(file_content)
+
+            # Identical content processed before? Return the cached result
+            # without touching disk or any provider API
+            cache_key = (hashlib.sha256(file_content).hexdigest(), settings.gemini_model_name)
+            cached = _result_cache.get(cache_key)
+            if cached is not None:
+                _result_cache.move_to_end(cache_key)
+                logger.info(f"Pipeline cache hit for {filename}, skipping reprocessing")
+                return {**cached, 'filename': filename}
+
+
+            # Create temporary file for processing - written via aiofiles so
+            # flushing a large PDF to disk doesn't stall the event loop
+            async with aiofiles.tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+                await temp_file.write(file_content)
                 temp_file_path = Path(temp_file.name)
             
             try:
@@ -79,10 +457,11 @@ class AdvancedDocumentProcessor:
                 if is_image_pdf:
                     logger.info(f"Early detection: {filename} is image-heavy. Using direct Gemini processing.")
                     
-                    # Use Gemini directly for image-based PDF processing
-                    gemini_response = await self._process_image_pdf_with_gemini(file_content, filename)
-                    
-                    return {
+                    # Use Gemini directly for image-based PDF processing,
+                    # reusing the temp file written above
+                    gemini_response = await self._process_image_pdf_with_gemini(temp_file_path, filename)
+
+                    result = {
                         'processing_status': 'success',
                         'filename': filename,
                         'processing_method': 'gemini_image_direct',
@@ -98,15 +477,26 @@ class AdvancedDocumentProcessor:
                         'word_count': len(gemini_response.split()),
                         'char_count': len(gemini_response)
                     }
+                    _cache_result(cache_key, result)
+                    return result
                 else:
                     logger.info(f"Early detection: {filename} is text-heavy. Using advanced AI pipeline.")
                     
-                    # Step 2: Extract markdown using Docling
-                    docling_markdown = await self._extract_markdown_with_docling(temp_file_path)
+                    # Steps 2+3: Docling (CPU work in a thread) and Mistral OCR
+                    # (network round-trips) read the same temp file and are
+                    # independent, so run them concurrently
+                    docling_markdown, mistral_markdown = await asyncio.gather(
+                        self._extract_markdown_with_docling(temp_file_path),
+                        self._extract_markdown_with_mistral(temp_file_path),
+                        return_exceptions=True
+                    )
+                    if isinstance(docling_markdown, BaseException):
+                        logger.error(f"❌ Docling extraction raised: {docling_markdown}")
+                        docling_markdown = ""
+                    if isinstance(mistral_markdown, BaseException):
+                        logger.error(f"❌ Mistral OCR extraction raised: {mistral_markdown}")
+                        mistral_markdown = ""
                     logger.info(f"Docling extraction completed: {len(docling_markdown)} characters")
-                    
-                    # Step 3: Extract markdown using Mistral OCR
-                    mistral_markdown = await self._extract_markdown_with_mistral(temp_file_path)
                     logger.info(f"Mistral OCR extraction completed: {len(mistral_markdown)} characters")
                     
                     # Step 4: Consolidate markdowns using Gemini (Request 1)
@@ -115,13 +505,18 @@ class AdvancedDocumentProcessor:
                     )
                     logger.info(f"Markdown consolidation completed: {len(consolidated_markdown)} characters")
                     
-                    # Step 5: Process document understanding with Gemini (Request 2)
-                    understanding_response = await self._process_document_understanding_with_gemini(
-                        consolidated_markdown, filename
+                    # Step 5: Acknowledge readiness. The old "understanding"
+                    # request asked Gemini to echo back a fixed confirmation
+                    # sentence - the model never retained anything between
+                    # calls, so the round-trip bought nothing. Chat requests
+                    # send the consolidated markdown as context anyway.
+                    understanding_response = (
+                        f"I have understood the document '{filename}' and I'm ready to chat "
+                        f"about its contents. I can help you find information, answer "
+                        f"questions, and discuss any aspect of this document."
                     )
-                    logger.info("Document understanding processing completed")
-                    
-                    return {
+
+                    result = {
                         'processing_status': 'success',
                         'filename': filename,
                         'processing_method': 'advanced_ai_pipeline',
@@ -141,11 +536,15 @@ class AdvancedDocumentProcessor:
                         'word_count': len(consolidated_markdown.split()),
                         'char_count': len(consolidated_markdown)
                     }
-                
+                    _cache_result(cache_key, result)
+                    return result
+
             finally:
-                # Clean up temporary file
+                # Clean up temporary file without blocking the event loop
                 try:
-                    temp_file_path.unlink()
+                    await aiofiles.os.remove(temp_file_path)
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     logger.warning(f"Failed to delete temp file: {e}")
                     
@@ -163,9 +562,15 @@ class AdvancedDocumentProcessor:
         """Extract markdown using Docling"""
         try:
             logger.info(f"Processing {pdf_path.name} with Docling...")
-            
-            # Convert the PDF document
-            conversion_result = self.docling_converter.convert(str(pdf_path))
+
+            # Convert the PDF document in the parsing pool - convert() blocks
+            # for tens of seconds, and the event loop must keep servicing
+            # Mistral I/O and other requests. The converter property is
+            # resolved inside the pool too, so its first-access construction
+            # never runs on the event loop.
+            conversion_result = await asyncio.get_running_loop().run_in_executor(
+                _DOCLING_POOL, lambda: self.docling_converter.convert(str(pdf_path))
+            )
             
             # Export the document content to Markdown
             if conversion_result and conversion_result.document:
@@ -191,47 +596,81 @@ class AdvancedDocumentProcessor:
             logger.info(f"   Mistral client: {type(self.mistral_client)}")
             logger.info(f"   File size: {pdf_path.stat().st_size} bytes")
             
-            # Upload file to Mistral
-            uploaded_file = self.mistral_client.files.upload(
-                file={
-                    "file_name": pdf_path.stem,
-                    "content": pdf_path.read_bytes(),
-                },
-                purpose="ocr",
-            )
-            
+            # Upload file to Mistral - the async client variants yield during
+            # each network round-trip instead of blocking the event loop.
+            # Passing the open handle lets the SDK stream the upload in
+            # chunks instead of holding the whole PDF in memory.
+            with open(pdf_path, 'rb') as pdf_handle:
+
+                async def _upload():
+                    # Rewind in case a previous attempt consumed the handle
+                    pdf_handle.seek(0)
+                    return await self.mistral_client.files.upload_async(
+                        file={
+                            "file_name": pdf_path.stem,
+                            "content": pdf_handle,
+                        },
+                        purpose="ocr",
+                    )
+
+                uploaded_file = await _retry_async(
+                    _upload, description="Mistral file upload"
+                )
+
             # Get signed URL
-            signed_url = self.mistral_client.files.get_signed_url(
-                file_id=uploaded_file.id, 
-                expiry=1
+            signed_url = await _retry_async(
+                self.mistral_client.files.get_signed_url_async,
+                file_id=uploaded_file.id,
+                expiry=1,
+                description="Mistral signed URL"
             )
-            
+
             # Process with OCR
-            pdf_response = self.mistral_client.ocr.process(
-                document=DocumentURLChunk(document_url=signed_url.url),
+            mistralai = _lazy_import('mistralai')
+            pdf_response = await _retry_async(
+                self.mistral_client.ocr.process_async,
+                document=mistralai.DocumentURLChunk(document_url=signed_url.url),
                 model="mistral-ocr-latest",
-                include_image_base64=True
+                # The extraction below only reads page markdown/text - base64
+                # page images would inflate the response 10-100x for nothing
+                include_image_base64=False,
+                description="Mistral OCR"
             )
-            
-            # Parse response
-            response_dict = json.loads(pdf_response.json())
-            
-            # Debug: Log the raw response structure
-            logger.info(f"🔍 Mistral OCR raw response structure:")
-            logger.info(f"   Keys: {list(response_dict.keys())}")
-            if len(str(response_dict)) < 2000:  # Only log if response is reasonably small
-                logger.info(f"   Full response: {json.dumps(response_dict, indent=2)}")
-            else:
-                logger.info(f"   Response too large ({len(str(response_dict))} chars), logging structure only")
-                for key, value in response_dict.items():
-                    if isinstance(value, list):
-                        logger.info(f"   {key}: list with {len(value)} items")
-                        if value and isinstance(value[0], dict):
-                            logger.info(f"      First item keys: {list(value[0].keys())}")
-                    elif isinstance(value, dict):
-                        logger.info(f"   {key}: dict with keys {list(value.keys())}")
-                    else:
-                        logger.info(f"   {key}: {type(value).__name__} = {str(value)[:100]}...")
+
+            # Extract markdown straight off the typed response when possible -
+            # no serialize-then-parse round-trip over the whole tree
+            pages = getattr(pdf_response, "pages", None)
+            if pages is not None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"🔍 Mistral OCR returned {len(pages)} pages")
+                markdown_content = self._extract_markdown_from_mistral_pages(pages)
+
+                logger.info(f"✓ Successfully processed {pdf_path.name} with Mistral OCR")
+                return markdown_content
+
+            # Fallback for unexpected response shapes: parse once and reuse
+            # the string for sizing
+            raw_json = pdf_response.json()
+            response_dict = json.loads(raw_json)
+
+            # Structure logging is DEBUG-only: pretty-printing a response that
+            # can carry megabytes of page data is pure overhead per PDF
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 Mistral OCR raw response structure:")
+                logger.debug(f"   Keys: {list(response_dict.keys())}")
+                if len(raw_json) < 2000:  # Only log if response is reasonably small
+                    logger.debug(f"   Full response: {json.dumps(response_dict, indent=2)}")
+                else:
+                    logger.debug(f"   Response too large ({len(raw_json)} chars), logging structure only")
+                    for key, value in response_dict.items():
+                        if isinstance(value, list):
+                            logger.debug(f"   {key}: list with {len(value)} items")
+                            if value and isinstance(value[0], dict):
+                                logger.debug(f"      First item keys: {list(value[0].keys())}")
+                        elif isinstance(value, dict):
+                            logger.debug(f"   {key}: dict with keys {list(value.keys())}")
+                        else:
+                            logger.debug(f"   {key}: {type(value).__name__} = {str(value)[:100]}...")
             
             # Extract markdown content from response
             markdown_content = self._extract_markdown_from_mistral_response(response_dict)
@@ -243,67 +682,63 @@ class AdvancedDocumentProcessor:
             logger.error(f"❌ Error in Mistral OCR processing for {pdf_path.name}: {str(e)}")
             return ""
     
+    def _extract_markdown_from_mistral_pages(self, pages) -> str:
+        """Join per-page markdown from the typed OCR response object"""
+        content_parts = []
+        for page_num, page in enumerate(pages, 1):
+            page_md = getattr(page, 'markdown', None) or getattr(page, 'text', None) or ''
+            content_parts.append(f"# Page {page_num}\n\n")
+            content_parts.append(page_md)
+            content_parts.append("\n\n")
+        return ''.join(content_parts)
+
     def _extract_markdown_from_mistral_response(self, response_dict: Dict) -> str:
         """Extract markdown content from Mistral OCR response"""
         try:
-            logger.info(f"🔍 Extracting markdown from Mistral response...")
-            
+            # Per-page chatter is DEBUG-only - at INFO a 500-page PDF would
+            # emit hundreds of formatted log lines
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("🔍 Extracting markdown from Mistral response...")
+
             # The response structure may vary, so we'll extract text content
             # and format it as markdown
             content_parts = []
-            
+
             if 'pages' in response_dict:
-                logger.info(f"   Found 'pages' key with {len(response_dict['pages'])} pages")
+                if debug:
+                    logger.debug(f"   Found 'pages' key with {len(response_dict['pages'])} pages")
                 for page_num, page in enumerate(response_dict['pages'], 1):
-                    logger.info(f"   Processing page {page_num}, keys: {list(page.keys())}")
-                    
                     # The actual Mistral OCR response uses 'markdown' field
-                    if 'markdown' in page:
-                        markdown_content = page['markdown']
-                        logger.info(f"   Found 'markdown' in page {page_num}: {len(markdown_content)} chars")
-                        content_parts.append(f"# Page {page_num}\n\n")
-                        content_parts.append(markdown_content)
-                    elif 'text' in page:
-                        text_content = page['text']
-                        logger.info(f"   Found 'text' in page {page_num}: {len(text_content)} chars")
-                        content_parts.append(f"# Page {page_num}\n\n")
-                        content_parts.append(text_content)
-                    elif 'content' in page:
-                        content_text = page['content']
-                        logger.info(f"   Found 'content' in page {page_num}: {len(content_text)} chars")
-                        content_parts.append(f"# Page {page_num}\n\n")
-                        content_parts.append(content_text)
-                    else:
-                        logger.warning(f"   No 'markdown', 'text', or 'content' found in page {page_num}")
-                        logger.warning(f"   Available page keys: {list(page.keys())}")
-                    
+                    page_content = page.get('markdown') or page.get('text') or page.get('content') or ''
+                    if page_content:
+                        content_parts.extend((f"# Page {page_num}\n\n", page_content))
+                    elif debug:
+                        logger.debug(f"   No 'markdown', 'text', or 'content' in page {page_num}, keys: {list(page.keys())}")
+
                     content_parts.append("\n\n")
-            
+
             elif 'markdown' in response_dict:
-                markdown_content = response_dict['markdown']
-                logger.info(f"   Found 'markdown' at root level: {len(markdown_content)} chars")
-                content_parts.append(markdown_content)
+                content_parts.append(response_dict['markdown'])
             elif 'text' in response_dict:
-                text_content = response_dict['text']
-                logger.info(f"   Found 'text' at root level: {len(text_content)} chars")
-                content_parts.append(text_content)
+                content_parts.append(response_dict['text'])
             elif 'content' in response_dict:
-                content_text = response_dict['content']
-                logger.info(f"   Found 'content' at root level: {len(content_text)} chars")
-                content_parts.append(content_text)
+                content_parts.append(response_dict['content'])
             else:
                 logger.warning(f"   No 'pages', 'markdown', 'text', or 'content' found in response!")
                 logger.warning(f"   Available keys: {list(response_dict.keys())}")
-                
+
                 # As a last resort, try to find any text-like content
                 for key, value in response_dict.items():
                     if isinstance(value, str) and len(value) > 100:  # Likely content
-                        logger.info(f"   Found potential content in '{key}': {len(value)} chars")
+                        if debug:
+                            logger.debug(f"   Found potential content in '{key}': {len(value)} chars")
                         content_parts.append(value)
                         break
-            
+
             final_content = ''.join(content_parts)
-            logger.info(f"   Final extracted content: {len(final_content)} chars")
+            if debug:
+                logger.debug(f"   Final extracted content: {len(final_content)} chars")
             
             if len(final_content.strip()) == 0:
                 logger.error(f"❌ Mistral OCR returned empty content!")
@@ -323,159 +758,233 @@ class AdvancedDocumentProcessor:
         mistral_markdown: str, 
         filename: str
     ) -> str:
-        """Consolidate two markdowns using Gemini (Request 1)"""
-        try:
-            model = genai.GenerativeModel(settings.gemini_model_name)
-            
-            consolidation_prompt = f"""
-You are an expert document analyst. I have extracted markdown content from the same PDF document "{filename}" using two different methods:
-
-1. **Docling Extraction**:
-```markdown
-{docling_markdown}
-```
-
-2. **Mistral OCR Extraction**:
-```markdown
-{mistral_markdown}
-```
-
-**Task**: Create a single, consolidated markdown that combines the best information from both extractions.
+        """Consolidate two markdowns using Gemini (Request 1)
 
-**Chain of Thought Process**:
-1. Analyze both markdowns to identify overlapping content
-2. Identify unique information present in only one extraction
-3. Remove duplicate information while preserving all unique content
-4. Maintain proper markdown structure and formatting
-5. Ensure the consolidated version is comprehensive and well-organized
+        When both extractions share the same "# Page N" boundaries the pages
+        are consolidated concurrently (capped by GEMINI_CONCURRENCY), which
+        turns one huge sequential request into several small parallel ones.
+        Documents without matching page boundaries go through as one piece.
+        """
+        try:
+            docling_pages = self._split_markdown_pages(docling_markdown)
+            mistral_pages = self._split_markdown_pages(mistral_markdown)
 
-**Instructions**:
-- These are two markdown representations of the same document
-- There will be duplicate information between them
-- One extraction might contain information missing from the other
-- Combine them intelligently to create the most complete version
-- Remove redundant/duplicate content
-- Preserve proper markdown formatting
-- Maintain logical document structure
+            if len(docling_pages) > 1 and len(docling_pages) == len(mistral_pages):
+                logger.info(f"Consolidating {len(docling_pages)} pages concurrently...")
+                page_results = await asyncio.gather(*(
+                    self._consolidate_chunk_with_gemini(d, m, filename)
+                    for d, m in zip(docling_pages, mistral_pages)
+                ))
+                consolidated_markdown = "\n\n".join(
+                    f"# Page {page_num}\n\n{part}"
+                    for page_num, part in enumerate(page_results, 1)
+                )
+            else:
+                consolidated_markdown = await self._consolidate_chunk_with_gemini(
+                    docling_markdown, mistral_markdown, filename
+                )
 
-**Output**: Return only the consolidated markdown content, no explanations.
-"""
-            
-            response = model.generate_content(consolidation_prompt)
-            consolidated_markdown = response.text
-            
             logger.info("Successfully consolidated markdowns with Gemini")
             return consolidated_markdown
-            
+
         except Exception as e:
             logger.error(f"Error consolidating markdowns with Gemini: {e}")
             # Fallback: combine both markdowns with headers
             fallback = f"# Document: {filename}\n\n## Docling Extraction\n\n{docling_markdown}\n\n## Mistral OCR Extraction\n\n{mistral_markdown}"
             return fallback
-    
-    async def _process_document_understanding_with_gemini(
-        self, 
-        consolidated_markdown: str, 
+
+    @staticmethod
+    def _split_markdown_pages(markdown: str) -> list:
+        """Split extracted markdown on its "# Page N" headings"""
+        pages = [part.strip() for part in _PAGE_HEADING_RE.split(markdown)]
+        return [part for part in pages if part]
+
+    async def _consolidate_chunk_with_gemini(
+        self,
+        docling_markdown: str,
+        mistral_markdown: str,
         filename: str
     ) -> str:
-        """Process document understanding with Gemini (Request 2)"""
-        try:
-            model = genai.GenerativeModel(settings.gemini_model_name)
-            
-            understanding_prompt = f"""
-You are an intelligent document assistant. I have processed and consolidated a document "{filename}" into the following markdown:
+        """Consolidate one matching pair of extraction chunks with Gemini"""
+        model = self._gemini_model
 
-```markdown
-{consolidated_markdown}
-```
+        consolidation_prompt = _CONSOLIDATION_TMPL.format_map({
+            "filename": filename,
+            "docling_markdown": docling_markdown,
+            "mistral_markdown": mistral_markdown,
+        })
+
+        async with _GEMINI_SEM:
+            await _acquire_gemini_quota(len(consolidation_prompt))
+            response = await _retry_async(
+                model.generate_content_async, consolidation_prompt,
+                description="Gemini consolidation"
+            )
+        return response.text
 
-**Task**: Understand and analyze this document content thoroughly.
+    async def _get_document_model(self, consolidated_markdown: str, filename: str) -> tuple:
+        """Fetch or create the document-scoped Gemini model
 
-**Chain of Thought Process**:
-1. Read through the entire document content
-2. Identify key themes, topics, and main points
-3. Understand the document structure and organization
-4. Note important data, figures, dates, and entities
-5. Prepare to answer questions about this document
+        Returns (model, seed_history, rebuild_at). The document context is
+        attached via a server-side context cache when the account and
+        document size allow it, otherwise as a seeded first exchange - so
+        subsequent turns only transmit the new user message. Only this
+        immutable triple is cached per document; callers build their own
+        ChatSession from it. The digest over the (potentially multi-MB)
+        markdown and the blocking context-cache upload both run in a worker
+        thread so concurrent requests keep flowing during a miss.
+        """
+        key = (
+            await asyncio.to_thread(
+                lambda: hashlib.sha256(consolidated_markdown.encode('utf-8')).hexdigest()
+            ),
+            settings.gemini_model_name,
+        )
+        entry = _chat_model_cache.get(key)
+        if entry is not None:
+            if entry[2] is None or time.monotonic() < entry[2]:
+                _chat_model_cache.move_to_end(key)
+                return entry
+            # The server-side context cache behind this model is at (or
+            # near) its TTL - drop the entry and build a fresh one below
+            del _chat_model_cache[key]
 
-**Instructions**:
-- Analyze the document content comprehensively
-- Understand the context, purpose, and key information
-- Be ready to answer questions about any part of the document
-- Maintain awareness of the document structure and details
+        entry = await asyncio.to_thread(
+            self._build_document_model, consolidated_markdown, filename
+        )
+        _chat_model_cache[key] = entry
+        while len(_chat_model_cache) > _CHAT_MODEL_MAX:
+            _chat_model_cache.popitem(last=False)
+        return entry
 
-**Response**: Reply with "I have understood the document '{filename}' and I'm ready to chat about its contents. I can help you find information, answer questions, and discuss any aspect of this document."
+    def _build_document_model(self, consolidated_markdown: str, filename: str) -> tuple:
+        """Build a (model, seed_history, rebuild_at) cache entry for a document
 
-Do not include the document content in your response - just confirm your understanding.
-"""
-            
-            response = model.generate_content(understanding_prompt)
-            understanding_response = response.text
-            
-            logger.info("Successfully processed document understanding with Gemini")
-            return understanding_response
-            
+        Blocking: CachedContent.create is a synchronous round-trip that
+        uploads the whole document context, so _get_document_model runs
+        this in a worker thread rather than on the event loop.
+        """
+        genai = _lazy_import('google.generativeai')
+        document_context = _CHAT_SYSTEM_TMPL.format_map({
+            "filename": filename,
+            "consolidated_markdown": consolidated_markdown,
+        })
+
+        model = self._gemini_model
+        seed_history = []
+        rebuild_at = None  # seeded history carries no server-side state to expire
+        try:
+            # Context caching uploads the static document portion once and
+            # references it each turn. Documents below the provider's minimum
+            # cacheable size raise, and we fall back to seeding the history.
+            caching = _lazy_import('google.generativeai.caching')
+            cached = caching.CachedContent.create(
+                model=settings.gemini_model_name,
+                system_instruction=document_context,
+                ttl=_CONTEXT_CACHE_TTL,
+            )
+            model = genai.GenerativeModel.from_cached_content(cached)
+            rebuild_at = (
+                time.monotonic()
+                + _CONTEXT_CACHE_TTL.total_seconds()
+                - _CONTEXT_CACHE_REFRESH_MARGIN
+            )
+            logger.info(f"Created Gemini context cache for '{filename}'")
         except Exception as e:
-            logger.error(f"Error processing document understanding with Gemini: {e}")
-            return f"I have processed the document '{filename}' and I'm ready to assist you with questions about its content."
-    
+            logger.info(f"Gemini context cache unavailable ({e}); seeding the chat history instead")
+            seed_history.append({"role": "user", "parts": [document_context]})
+            seed_history.append({
+                "role": "model",
+                "parts": [f"I have understood the document '{filename}' and I'm ready to chat about its contents."]
+            })
+
+        return (model, seed_history, rebuild_at)
+
+    @staticmethod
+    def _evict_document_model(consolidated_markdown: str) -> None:
+        """Forget the cached model for a document so the next request rebuilds it
+
+        Called after a send fails: the usual non-transient cause is the
+        server-side context cache expiring underneath the model, and no
+        amount of retrying the same model recovers from that.
+        """
+        key = (
+            hashlib.sha256(consolidated_markdown.encode('utf-8')).hexdigest(),
+            settings.gemini_model_name,
+        )
+        _chat_model_cache.pop(key, None)
+
+    async def _start_chat_session(
+        self,
+        consolidated_markdown: str,
+        filename: str,
+        chat_history: Optional[list] = None
+    ):
+        """Build a fresh chat session from the caller's own history
+
+        A new ChatSession per request keeps conversation state with the
+        caller - concurrent chats against the same document never mutate a
+        shared session's history - while the expensive document context is
+        still reused through the cached document model.
+        """
+        model, seed_history, _ = await self._get_document_model(consolidated_markdown, filename)
+
+        history = list(seed_history)
+        if chat_history:
+            for msg in chat_history[-5:]:  # Include last 5 messages for context
+                role = "user" if msg.get('sender') == 'user' else "model"
+                history.append({"role": role, "parts": [msg.get('content', '')]})
+
+        return model.start_chat(history=history)
+
     async def chat_with_document(
-        self, 
-        user_message: str, 
-        consolidated_markdown: str, 
+        self,
+        user_message: str,
+        consolidated_markdown: str,
         filename: str,
         chat_history: Optional[list] = None
     ) -> str:
         """Chat with the document using Gemini"""
         try:
-            model = genai.GenerativeModel(settings.gemini_model_name)
-            
-            # Build conversation context with enhanced system prompt
-            context = f"""
-You are an intelligent document assistant specializing in analyzing and discussing document content.
-
-**Document Context**: You are chatting about the document "{filename}".
-
-**Document Content**:
-```markdown
-{consolidated_markdown}
-```
-
-**System Instructions**:
-1. **Primary Focus**: Always prioritize information from the document content provided above
-2. **Document Summarization**: When asked about the document or for an overview, provide a comprehensive summary
-3. **Accuracy**: Base all responses strictly on the document content
-4. **Specificity**: Reference specific sections, data points, or details from the document
-5. **Clarity**: If information isn't in the document, clearly state "This information is not available in the document"
-6. **Context Awareness**: Maintain conversation context from previous messages
-7. **Helpfulness**: Provide detailed, useful responses that help users understand the document
+            session = await self._start_chat_session(
+                consolidated_markdown, filename, chat_history
+            )
 
-**Previous Conversation**:
-"""
-            
-            if chat_history:
-                for msg in chat_history[-5:]:  # Include last 5 messages for context
-                    role = "User" if msg.get('sender') == 'user' else "Assistant"
-                    context += f"{role}: {msg.get('content', '')}\n"
-            
-            context += f"""
-**Current User Question**: {user_message}
-
-**Response Guidelines**:
-- Answer based on the document content provided above
-- Be specific and reference relevant parts of the document
-- If the user asks for a summary, provide a comprehensive overview of the document
-- If the information isn't in the document, clearly state that
-- Provide helpful, detailed, and accurate responses
-- Maintain conversation context from previous messages
-"""
-            
-            response = model.generate_content(context)
+            await _acquire_gemini_quota(len(user_message))
+            response = await _retry_async(
+                session.send_message_async, user_message,
+                description="Gemini document chat"
+            )
             return response.text
-            
+
         except Exception as e:
             logger.error(f"Error in document chat: {e}")
+            self._evict_document_model(consolidated_markdown)
             return "I apologize, but I encountered an error while processing your question. Please try again."
+
+    async def chat_with_document_stream(
+        self,
+        user_message: str,
+        consolidated_markdown: str,
+        filename: str,
+        chat_history: Optional[list] = None
+    ):
+        """Chat with the document using Gemini, yielding response text chunks"""
+        try:
+            session = await self._start_chat_session(
+                consolidated_markdown, filename, chat_history
+            )
+
+            await _acquire_gemini_quota(len(user_message))
+            response = await session.send_message_async(user_message, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        except Exception as e:
+            logger.error(f"Error in streaming document chat: {e}")
+            self._evict_document_model(consolidated_markdown)
+            yield "I apologize, but I encountered an error while processing your question. Please try again."
     
     def is_pdf_file(self, mime_type: str) -> bool:
         """Check if file is a PDF"""
@@ -493,61 +1002,14 @@ You are an intelligent document assistant specializing in analyzing and discussi
             True if PDF appears to be image-heavy
         """
         try:
-            import PyPDF2
-            
             logger.info(f"Performing early image detection on: {pdf_path.name}")
-            
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check first few pages for text content
-                pages_to_check = min(3, len(pdf_reader.pages))  # Check first 3 pages or all if less
-                total_text_length = 0
-                total_images = 0
-                
-                for page_num in range(pages_to_check):
-                    page = pdf_reader.pages[page_num]
-                    
-                    # Extract text from page
-                    try:
-                        page_text = page.extract_text().strip()
-                        # Clean text and count meaningful characters
-                        clean_text = page_text.replace('\n', ' ').replace(' ', '')
-                        total_text_length += len(clean_text)
-                        
-                        # Count images/graphics on the page
-                        if '/XObject' in page.get('/Resources', {}):
-                            xobjects = page['/Resources']['/XObject']
-                            for obj_name in xobjects:
-                                obj = xobjects[obj_name]
-                                if obj.get('/Subtype') == '/Image':
-                                    total_images += 1
-                                    
-                    except Exception as e:
-                        logger.warning(f"Error analyzing page {page_num}: {e}")
-                        continue
-                
-                # Calculate metrics
-                avg_text_per_page = total_text_length / pages_to_check if pages_to_check > 0 else 0
-                avg_images_per_page = total_images / pages_to_check if pages_to_check > 0 else 0
-                
-                # Thresholds for image-heavy detection
-                MIN_TEXT_PER_PAGE = 50  # Less than 50 meaningful characters per page
-                MIN_IMAGE_RATIO = 0.5   # At least 0.5 images per page
-                
-                is_image_heavy = (
-                    avg_text_per_page < MIN_TEXT_PER_PAGE or 
-                    (avg_images_per_page >= MIN_IMAGE_RATIO and avg_text_per_page < 100)
-                )
-                
-                logger.info(f"Early detection results: "
-                          f"avg_text_per_page={avg_text_per_page:.1f}, "
-                          f"avg_images_per_page={avg_images_per_page:.1f}, "
-                          f"total_pages={len(pdf_reader.pages)}, "
-                          f"is_image_heavy={is_image_heavy}")
-                
-                return is_image_heavy
-                
+
+            # The pdfium scan is blocking CPU work - run it in the pdfium
+            # worker pool, where nothing else touches the library
+            return await asyncio.get_running_loop().run_in_executor(
+                _get_pdf_page_pool(), _scan_pdf_structure, str(pdf_path)
+            )
+
         except Exception as e:
             logger.error(f"Early image detection failed: {e}")
             # If detection fails, default to text processing (safer fallback)
@@ -565,8 +1027,8 @@ You are an intelligent document assistant specializing in analyzing and discussi
             True if PDF appears to be image-heavy (low text content)
         """
         # Calculate total meaningful text length (excluding whitespace)
-        docling_clean = docling_markdown.strip().replace('\n', ' ').replace(' ', '')
-        mistral_clean = mistral_markdown.strip().replace('\n', ' ').replace(' ', '')
+        docling_clean = docling_markdown.translate(_WS_STRIP)
+        mistral_clean = mistral_markdown.translate(_WS_STRIP)
         
         total_clean_chars = len(docling_clean) + len(mistral_clean)
         
@@ -584,93 +1046,121 @@ You are an intelligent document assistant specializing in analyzing and discussi
             
         return is_image_heavy
 
-    async def _process_image_pdf_with_gemini(self, file_content: bytes, filename: str) -> str:
+    @staticmethod
+    def _slice_pdf(pdf_path: Path, chunk_pages: int) -> list:
+        """Write `chunk_pages`-sized slices of a PDF to temp files.
+
+        Returns the original path as a single-element list when the document
+        already fits in one chunk. Blocking parse work - run in the pool.
+        """
+        PyPDF2 = _lazy_import('PyPDF2')
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            num_pages = len(reader.pages)
+            if num_pages <= chunk_pages:
+                return [pdf_path]
+
+            chunk_paths = []
+            for start in range(0, num_pages, chunk_pages):
+                writer = PyPDF2.PdfWriter()
+                for idx in range(start, min(start + chunk_pages, num_pages)):
+                    writer.add_page(reader.pages[idx])
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as chunk_file:
+                    writer.write(chunk_file)
+                    chunk_paths.append(Path(chunk_file.name))
+            return chunk_paths
+
+    async def _summarize_pdf_file_with_gemini(self, pdf_path: Path, prompt: str, label: str) -> str:
+        """Upload one PDF (or slice of one) to Gemini and summarize it"""
+        genai = _lazy_import('google.generativeai')
+
+        # The sync SDK calls run in threads so uploads don't block the loop
+        uploaded_file = await asyncio.to_thread(
+            genai.upload_file, str(pdf_path), mime_type='application/pdf'
+        )
+        logger.info(f"Uploaded {label} to Gemini: {uploaded_file.name}")
+
+        try:
+            # Wait for processing to complete - poll with capped exponential
+            # backoff, yielding to other requests between checks
+            delay = 0.5
+            while uploaded_file.state.name == "PROCESSING":
+                logger.info(f"Waiting for Gemini to process {label}...")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                uploaded_file = await asyncio.to_thread(genai.get_file, uploaded_file.name)
+
+            if uploaded_file.state.name == "FAILED":
+                raise Exception(f"Gemini failed to process {label}")
+
+            model = self._gemini_model
+            async with _GEMINI_SEM:
+                await _acquire_gemini_quota(len(prompt))
+                response = await _retry_async(
+                    model.generate_content_async, [uploaded_file, prompt],
+                    description="Gemini image analysis"
+                )
+            return response.text
+
+        finally:
+            # Clean up uploaded file
+            try:
+                await asyncio.to_thread(genai.delete_file, uploaded_file.name)
+            except Exception as e:
+                logger.warning(f"Failed to delete Gemini file for {label}: {e}")
+
+    async def _process_image_pdf_with_gemini(self, temp_file_path: Path, filename: str) -> str:
         """
         Process image-heavy PDF directly with Gemini vision capabilities
-        
+
+        Large documents are sliced into page groups that Gemini analyzes
+        concurrently (bounded by the shared semaphore); a single failure only
+        retries its own slice rather than the whole document.
+
         Args:
-            file_content: PDF file content as bytes
+            temp_file_path: Path to the already-written PDF temp file
             filename: Original filename
-            
+
         Returns:
             Processed and summarized content from Gemini
         """
         try:
             logger.info(f"Processing image-heavy PDF {filename} with Gemini vision")
-            
-            # Upload file to Gemini
-            import tempfile
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(file_content)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Upload PDF to Gemini
-                uploaded_file = genai.upload_file(temp_file_path, mime_type='application/pdf')
-                logger.info(f"Uploaded PDF to Gemini: {uploaded_file.name}")
-                
-                # Wait for processing to complete
-                import time
-                while uploaded_file.state.name == "PROCESSING":
-                    logger.info("Waiting for Gemini to process the PDF...")
-                    time.sleep(2)
-                    uploaded_file = genai.get_file(uploaded_file.name)
-                
-                if uploaded_file.state.name == "FAILED":
-                    raise Exception("Gemini failed to process the PDF")
-                
-                # Create model and process document
-                model = genai.GenerativeModel(settings.gemini_model_name)
-                
-                # System prompt with summarization instruction
-                image_pdf_prompt = f"""
-You are an expert document analyst processing an image-heavy PDF document "{filename}".
-
-**Primary Task**: Analyze this PDF document and provide a comprehensive summary.
 
-**Instructions**:
-1. **Summarize the document**: Extract and summarize all key information, content, and insights from this PDF
-2. **Be comprehensive**: Include all important details, data, figures, charts, diagrams, and text content
-3. **Structure your response**: Organize the summary in a clear, logical format using markdown
-4. **Extract everything**: Don't miss any important information - this will be used for future conversations about the document
-5. **Be detailed**: Provide enough detail so that someone reading your summary would understand the document's complete content
+            # Slicing is blocking parse work - run it in the parsing pool
+            chunk_paths = await asyncio.get_running_loop().run_in_executor(
+                _DOCLING_POOL, self._slice_pdf, temp_file_path, _IMAGE_PDF_CHUNK_PAGES
+            )
 
-**Output Format**:
-# Document Summary: {filename}
+            image_pdf_prompt = _IMAGE_PDF_TMPL.format_map({"filename": filename})
 
-## Overview
-[Brief overview of what this document is about]
+            if len(chunk_paths) == 1:
+                return await self._summarize_pdf_file_with_gemini(
+                    chunk_paths[0], image_pdf_prompt, filename
+                )
 
-## Key Content
-[Detailed summary of all important content, organized by sections/topics]
+            try:
+                summaries = await asyncio.gather(*(
+                    self._summarize_pdf_file_with_gemini(
+                        chunk_path, image_pdf_prompt, f"{filename} (part {part})"
+                    )
+                    for part, chunk_path in enumerate(chunk_paths, 1)
+                ))
+            finally:
+                for chunk_path in chunk_paths:
+                    try:
+                        await aiofiles.os.remove(chunk_path)
+                    except FileNotFoundError:
+                        pass
 
-## Important Data/Figures
-[Any numerical data, charts, graphs, or important figures]
+            gemini_summary = "\n\n".join(
+                f"# Part {part} of {len(summaries)}\n\n{summary}"
+                for part, summary in enumerate(summaries, 1)
+            )
 
-## Conclusions/Key Takeaways
-[Main conclusions or key points from the document]
+            logger.info(f"Successfully processed image PDF with Gemini: {len(gemini_summary)} characters")
+            return gemini_summary
 
-**Note**: This summary will be used for AI-powered conversations about the document content, so be thorough and accurate.
-"""
-                
-                response = model.generate_content([uploaded_file, image_pdf_prompt])
-                gemini_summary = response.text
-                
-                logger.info(f"Successfully processed image PDF with Gemini: {len(gemini_summary)} characters")
-                
-                # Clean up uploaded file
-                genai.delete_file(uploaded_file.name)
-                
-                return gemini_summary
-                
-            finally:
-                # Clean up temp file
-                import os
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp file: {e}")
-                    
         except Exception as e:
             logger.error(f"Error processing image PDF with Gemini: {e}")
             return f"Error processing image-heavy PDF '{filename}': {str(e)}. Please try uploading the document again."
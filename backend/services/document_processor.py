@@ -3,109 +3,358 @@ Document processing service for extracting text and metadata from various file t
 """
 
 import os
+import io
+import re
+import asyncio
+import hashlib
 import logging
 import mimetypes
-from typing import Dict, Any, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import BinaryIO, Dict, Any, Optional, Union
 import tempfile
 import aiofiles
 from pathlib import Path
 
-# Document processing libraries
-import PyPDF2
-from docx import Document as DocxDocument
-import pandas as pd
-from PIL import Image
-import magic
-
-from .advanced_document_processor import AdvancedDocumentProcessor
+# Document processing libraries (pypdfium2, docx, openpyxl, pandas, PIL,
+# magic) are imported lazily on first use via _lazy_import to keep module
+# import cheap
+from .advanced_document_processor import (
+    AdvancedDocumentProcessor,
+    _get_pdf_page_pool,
+    _lazy_import,
+)
 
 logger = logging.getLogger(__name__)
 
+# Word counting iterates matches instead of text.split(), which would
+# allocate (and immediately discard) one string object per token - a real
+# cost on multi-MB extractions
+_WORD_RE = re.compile(r'\S+')
+
+def _word_count(text: str) -> int:
+    """Count whitespace-separated tokens without materializing them"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+# Page-level text extraction is CPU-bound and serialized by the GIL, so
+# large PDFs fan out across the shared pdfium worker pool. All raw pdfium
+# use is confined there: PDFium is not thread-safe, and Docling drives it
+# from conversion threads in this process.
+_PARALLEL_PAGE_THRESHOLD = 20
+
+def _extract_pdf_page_text(file_path: str, page_idx: int) -> tuple:
+    """Extract one PDF page as (text, word count) - runs in a worker process.
+
+    Counting happens here, while the page text is still hot in cache and
+    inside the worker, so the parent process never re-scans the joined text.
+    """
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        textpage = pdf[page_idx].get_textpage()
+        try:
+            text = textpage.get_text_range()
+        finally:
+            textpage.close()
+        return text, _word_count(text)
+    finally:
+        pdf.close()
+
+def _scan_pdf_document(file_path: str, max_sequential: int) -> tuple:
+    """Open a PDF once and return (page count, info dict, pages text or None).
+
+    Small documents have their text extracted in the same pass, so the file
+    is parsed exactly once; documents over `max_sequential` pages return
+    None for the text and go through the process pool instead. Blocking.
+    """
+    pdfium = _lazy_import('pypdfium2')
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        num_pages = len(pdf)
+        doc_info = pdf.get_metadata_dict()
+
+        if num_pages > max_sequential:
+            return num_pages, doc_info, None
+
+        pages = []
+        for page_idx in range(num_pages):
+            textpage = pdf[page_idx].get_textpage()
+            text = textpage.get_text_range()
+            # Free the C-side text buffers as we go
+            textpage.close()
+            pages.append((text, _word_count(text)))
+        return num_pages, doc_info, pages
+    finally:
+        pdf.close()
+
+# libmagic re-parses its multi-MB compiled pattern database every time a
+# fresh Magic object is built, so one instance is kept for the process
+_magic_instance = None
+
+def _get_magic():
+    """Shared libmagic MIME detector, constructed on first use"""
+    global _magic_instance
+    if _magic_instance is None:
+        magic = _lazy_import('magic')
+        _magic_instance = magic.Magic(mime=True)
+    return _magic_instance
+
+# Workbooks with at least this many sheets decode their sheets in parallel
+_PARALLEL_SHEET_THRESHOLD = 4
+
+def _read_excel_worksheet(worksheet) -> tuple:
+    """Stream one worksheet into text, returning (text, word count, stats).
+
+    Words are counted per row while the line is still hot in cache, so the
+    accumulated sheet text is written once and never re-scanned.
+    """
+    buf = io.StringIO()
+    header = f"Sheet: {worksheet.title}\n"
+    buf.write(header)
+    words = _word_count(header)
+
+    num_rows = 0
+    column_names = []
+    for row in worksheet.iter_rows(values_only=True):
+        if num_rows == 0:
+            column_names = ['' if v is None else str(v) for v in row]
+        line = '\t'.join('' if v is None else str(v) for v in row)
+        buf.write(line)
+        buf.write('\n')
+        words += _word_count(line)
+        num_rows += 1
+
+    return buf.getvalue(), words, {
+        'rows': num_rows,
+        'columns': worksheet.max_column or 0,
+        'column_names': column_names
+    }
+
+def _extract_excel_sheet(file_path: str, sheet_name: str) -> tuple:
+    """Read one sheet via a private workbook handle (runs in a worker thread)"""
+    openpyxl = _lazy_import('openpyxl')
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return _read_excel_worksheet(workbook[sheet_name])
+    finally:
+        workbook.close()
+
+def _read_csv_stats(file_path: str) -> Dict[str, Any]:
+    """Collect CSV shape/type metadata - blocking, runs in a worker thread.
+
+    Prefers pyarrow's multi-threaded C++ reader; falls back to pandas when
+    pyarrow isn't installed.
+    """
+    try:
+        pacsv = _lazy_import('pyarrow.csv')
+        table = pacsv.read_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20)
+        )
+        return {
+            'num_rows': table.num_rows,
+            'num_columns': table.num_columns,
+            'column_names': list(table.schema.names),
+            'data_types': {
+                name: str(dtype)
+                for name, dtype in zip(table.schema.names, table.schema.types)
+            }
+        }
+    except ImportError:
+        pd = _lazy_import('pandas')
+        df = pd.read_csv(file_path)
+        return {
+            'num_rows': len(df),
+            'num_columns': len(df.columns),
+            'column_names': list(df.columns),
+            'data_types': {col: str(dtype) for col, dtype in df.dtypes.items()}
+        }
+
+def _read_image_metadata(file_path: str) -> Dict[str, Any]:
+    """Open an image and collect its basic properties - blocking"""
+    Image = _lazy_import('PIL.Image')
+    with Image.open(file_path) as img:
+        return {
+            'format': img.format,
+            'mode': img.mode,
+            'size': img.size,
+            'width': img.width,
+            'height': img.height
+        }
+
+def _list_excel_sheet_names(file_path: str) -> list:
+    """Open a workbook just long enough to list its sheets - blocking"""
+    openpyxl = _lazy_import('openpyxl')
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+def _extract_excel_sheets(file_path: str) -> list:
+    """Stream every sheet through one workbook handle (blocking, worker thread)"""
+    openpyxl = _lazy_import('openpyxl')
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return [_read_excel_worksheet(ws) for ws in workbook.worksheets]
+    finally:
+        workbook.close()
+
+# Completed processing results keyed by content digest - a byte-identical
+# re-upload within this worker skips extraction entirely. The router-level
+# document_fingerprints table is the persistent cross-worker layer; this one
+# also covers the basic (non-PDF) file types. blake2b runs ~3x faster than
+# sha256 in CPython and 16 bytes is ample for a dedup key.
+_PROC_CACHE_MAX = 32
+_proc_result_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def _cache_proc_result(digest: str, result: Dict[str, Any]):
+    """Remember a successful result, evicting the oldest over capacity"""
+    _proc_result_cache[digest] = result
+    _proc_result_cache.move_to_end(digest)
+    while len(_proc_result_cache) > _PROC_CACHE_MAX:
+        _proc_result_cache.popitem(last=False)
+
 class DocumentProcessor:
     """Service for processing various document types"""
-    
+
+    # MIME type -> handler method name, frozen at class-definition time.
+    # Storing names instead of bound methods keeps the table shared across
+    # instances (no per-instance dict of method wrappers built in __init__);
+    # dispatch is one dict probe plus one getattr.
+    _SUPPORTED = MappingProxyType({
+        'application/pdf': '_process_pdf',
+        'application/msword': '_process_doc',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '_process_docx',
+        'application/vnd.ms-excel': '_process_excel',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '_process_excel',
+        'text/plain': '_process_text',
+        'text/csv': '_process_csv',
+        'image/jpeg': '_process_image',
+        'image/png': '_process_image',
+    })
+
     def __init__(self):
         self.advanced_processor = AdvancedDocumentProcessor()
-        self.supported_types = {
-            'application/pdf': self._process_pdf,
-            'application/msword': self._process_doc,
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document': self._process_docx,
-            'application/vnd.ms-excel': self._process_excel,
-            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': self._process_excel,
-            'text/plain': self._process_text,
-            'text/csv': self._process_csv,
-            'image/jpeg': self._process_image,
-            'image/png': self._process_image,
-        }
     
-    async def process_document(self, file_content: bytes, filename: str, mime_type: str) -> Dict[str, Any]:
+    async def process_document(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        filename: str,
+        mime_type: str
+    ) -> Dict[str, Any]:
         """
         Process document and extract content and metadata
-        
+
         Args:
-            file_content: Raw file bytes
+            file_content: Raw file bytes, or an open binary stream. Streams
+                going through the basic path are hashed and spooled to disk
+                in 1 MiB blocks so the document is never fully resident
             filename: Original filename
             mime_type: MIME type of the file
-        
+
         Returns:
             Dictionary containing extracted text, metadata, and processing info
         """
+        file_size = 0
         try:
             # Validate file type
-            if mime_type not in self.supported_types:
+            if mime_type not in self._SUPPORTED:
                 raise ValueError(f"Unsupported file type: {mime_type}")
-            
+
+            # The advanced PDF pipeline caches by full content, so it needs
+            # the bytes either way; only the basic path can stay streaming
+            is_stream = not isinstance(file_content, (bytes, bytearray))
+            if is_stream and self.advanced_processor.is_pdf_file(mime_type):
+                file_content.seek(0)
+                file_content = file_content.read()
+                is_stream = False
+
+            digest = None
+            if not is_stream:
+                file_size = len(file_content)
+                # Identical content processed before? Skip extraction entirely
+                digest = hashlib.blake2b(file_content, digest_size=16).hexdigest()
+                cached = _proc_result_cache.get(digest)
+                if cached is not None:
+                    _proc_result_cache.move_to_end(digest)
+                    logger.info(f"Returning cached processing result for {filename} (content match)")
+                    return {**cached, 'filename': filename}
+
             # Use advanced processing for PDFs
             if self.advanced_processor.is_pdf_file(mime_type):
                 logger.info(f"Using advanced AI pipeline for PDF: {filename}")
                 result = await self.advanced_processor.process_pdf_document(file_content, filename)
-                
+
                 # Add common metadata
                 result.update({
                     'filename': filename,
                     'mime_type': mime_type,
-                    'file_size': len(file_content)
+                    'file_size': file_size
                 })
-                
+
+                if result.get('processing_status') == 'success':
+                    _cache_proc_result(digest, result)
+
                 return result
-            
+
             # Use basic processing for other file types
             logger.info(f"Using basic processing for: {filename}")
-            
+
             # Create temporary file
             with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename).suffix) as temp_file:
-                temp_file.write(file_content)
+                if is_stream:
+                    # Copy block-by-block, hashing as we go - peak memory
+                    # stays at one block instead of the whole document
+                    hasher = hashlib.blake2b(digest_size=16)
+                    file_content.seek(0)
+                    while block := file_content.read(1 << 20):
+                        hasher.update(block)
+                        temp_file.write(block)
+                    digest = hasher.hexdigest()
+                    file_size = os.fstat(temp_file.fileno()).st_size
+                else:
+                    temp_file.write(file_content)
                 temp_file_path = temp_file.name
-            
+
             try:
+                if is_stream:
+                    cached = _proc_result_cache.get(digest)
+                    if cached is not None:
+                        _proc_result_cache.move_to_end(digest)
+                        logger.info(f"Returning cached processing result for {filename} (content match)")
+                        return {**cached, 'filename': filename}
+
                 # Process based on file type
-                processor = self.supported_types[mime_type]
+                processor = getattr(self, self._SUPPORTED[mime_type])
                 result = await processor(temp_file_path, filename)
-                
+
                 # Add common metadata
                 result.update({
                     'filename': filename,
                     'mime_type': mime_type,
-                    'file_size': len(file_content),
+                    'file_size': file_size,
                     'processing_status': 'success'
                 })
-                
+
                 logger.info(f"Successfully processed document: {filename}")
+                _cache_proc_result(digest, result)
                 return result
-                
+
             finally:
                 # Clean up temporary file
                 try:
                     os.unlink(temp_file_path)
                 except Exception as e:
                     logger.warning(f"Failed to delete temp file {temp_file_path}: {e}")
-                    
+
         except Exception as e:
             logger.error(f"Document processing failed for {filename}: {e}")
             return {
                 'filename': filename,
                 'mime_type': mime_type,
-                'file_size': len(file_content),
+                'file_size': file_size,
                 'processing_status': 'error',
                 'error_message': str(e),
                 'extracted_text': '',
@@ -115,33 +364,47 @@ class DocumentProcessor:
     async def _process_pdf(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process PDF document"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract text from all pages
-                text_content = []
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    text_content.append(page_text)
-                
-                extracted_text = '\n'.join(text_content)
-                
-                # Extract metadata
-                metadata = {
-                    'num_pages': len(pdf_reader.pages),
-                    'title': pdf_reader.metadata.get('/Title', '') if pdf_reader.metadata else '',
-                    'author': pdf_reader.metadata.get('/Author', '') if pdf_reader.metadata else '',
-                    'subject': pdf_reader.metadata.get('/Subject', '') if pdf_reader.metadata else '',
-                    'creator': pdf_reader.metadata.get('/Creator', '') if pdf_reader.metadata else '',
-                }
-                
-                return {
-                    'extracted_text': extracted_text,
-                    'metadata': metadata,
-                    'word_count': len(extracted_text.split()),
-                    'char_count': len(extracted_text)
-                }
-                
+            # pdfium extracts text in native code - no Python-level glyph
+            # assembly loop - and is typically several times faster than
+            # PyPDF2 on the same document. The scan runs in the pdfium
+            # worker pool (never in-process threads - PDFium isn't
+            # thread-safe), and small documents parse the file exactly once.
+            loop = asyncio.get_running_loop()
+            pool = _get_pdf_page_pool()
+            num_pages, doc_info, pages = await loop.run_in_executor(
+                pool, _scan_pdf_document, file_path, _PARALLEL_PAGE_THRESHOLD
+            )
+
+            # Large documents fan out one page per worker process - pages are
+            # independent once the xref is loaded; gather preserves order
+            if pages is None:
+                pages = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _extract_pdf_page_text, file_path, page_idx)
+                    for page_idx in range(num_pages)
+                ))
+
+            # Per-page counts were taken during extraction; the '\n' joins
+            # never merge tokens, so summing them is exact and the joined
+            # text needs no second traversal
+            extracted_text = '\n'.join(text for text, _ in pages)
+            word_count = sum(words for _, words in pages)
+
+            # Extract metadata (pdfium uses bare info-dictionary keys)
+            metadata = {
+                'num_pages': num_pages,
+                'title': doc_info.get('Title', ''),
+                'author': doc_info.get('Author', ''),
+                'subject': doc_info.get('Subject', ''),
+                'creator': doc_info.get('Creator', ''),
+            }
+
+            return {
+                'extracted_text': extracted_text,
+                'metadata': metadata,
+                'word_count': word_count,
+                'char_count': len(extracted_text)
+            }
+
         except Exception as e:
             logger.error(f"PDF processing failed: {e}")
             raise
@@ -149,33 +412,43 @@ class DocumentProcessor:
     async def _process_docx(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process DOCX document"""
         try:
-            doc = DocxDocument(file_path)
-            
-            # Extract text from paragraphs
-            text_content = []
+            docx = _lazy_import('docx')
+            # Parsing the package is blocking XML work - run it off-loop
+            doc = await asyncio.to_thread(docx.Document, file_path)
+
+            # Extract text from paragraphs - filtering, assembly and word
+            # counting fused into one pass over the document
+            buf = io.StringIO()
+            word_count = 0
             for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text)
-            
-            extracted_text = '\n'.join(text_content)
+                text = paragraph.text
+                if not text.strip():
+                    continue
+                if buf.tell():
+                    buf.write('\n')
+                buf.write(text)
+                word_count += _word_count(text)
+            extracted_text = buf.getvalue()
             
-            # Extract metadata
+            # Extract metadata - bind the properties part once instead of
+            # re-resolving it for every field
+            props = doc.core_properties
             metadata = {
-                'title': doc.core_properties.title or '',
-                'author': doc.core_properties.author or '',
-                'subject': doc.core_properties.subject or '',
-                'created': str(doc.core_properties.created) if doc.core_properties.created else '',
-                'modified': str(doc.core_properties.modified) if doc.core_properties.modified else '',
+                'title': props.title or '',
+                'author': props.author or '',
+                'subject': props.subject or '',
+                'created': str(props.created) if props.created else '',
+                'modified': str(props.modified) if props.modified else '',
                 'num_paragraphs': len(doc.paragraphs),
             }
             
             return {
                 'extracted_text': extracted_text,
                 'metadata': metadata,
-                'word_count': len(extracted_text.split()),
+                'word_count': word_count,
                 'char_count': len(extracted_text)
             }
-            
+
         except Exception as e:
             logger.error(f"DOCX processing failed: {e}")
             raise
@@ -193,29 +466,35 @@ class DocumentProcessor:
     async def _process_excel(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process Excel document"""
         try:
-            # Read Excel file
-            df = pd.read_excel(file_path, sheet_name=None)  # Read all sheets
-            
-            # Extract text content from all sheets
-            text_content = []
-            total_rows = 0
-            sheet_info = {}
-            
-            for sheet_name, sheet_df in df.items():
-                sheet_text = sheet_df.to_string(index=False)
-                text_content.append(f"Sheet: {sheet_name}\n{sheet_text}")
-                
-                sheet_info[sheet_name] = {
-                    'rows': len(sheet_df),
-                    'columns': len(sheet_df.columns),
-                    'column_names': list(sheet_df.columns)
-                }
-                total_rows += len(sheet_df)
-            
-            extracted_text = '\n\n'.join(text_content)
-            
+            # read_only streams rows with constant memory and data_only
+            # returns computed values instead of formula strings. Going
+            # through pandas cost a DataFrame per sheet plus to_string()'s
+            # column-width formatting pass - all for plain text extraction.
+            sheet_names = await asyncio.to_thread(_list_excel_sheet_names, file_path)
+
+            if len(sheet_names) >= _PARALLEL_SHEET_THRESHOLD:
+                # openpyxl releases the GIL while inflating the zip stream,
+                # so sheets decode in parallel; each worker opens its own
+                # workbook handle since read_only worksheets aren't
+                # thread-safe
+                loop = asyncio.get_running_loop()
+                with ThreadPoolExecutor(max_workers=4) as pool:
+                    parts = await asyncio.gather(*(
+                        loop.run_in_executor(pool, _extract_excel_sheet, file_path, name)
+                        for name in sheet_names
+                    ))
+            else:
+                parts = await asyncio.to_thread(_extract_excel_sheets, file_path)
+
+            # Sheet texts never end mid-token, so the per-sheet counts taken
+            # during streaming sum exactly - no second pass over the joined text
+            extracted_text = '\n\n'.join(text for text, _, _ in parts)
+            word_count = sum(words for _, words, _ in parts)
+            sheet_info = {name: info for name, (_, _, info) in zip(sheet_names, parts)}
+            total_rows = sum(info['rows'] for _, _, info in parts)
+
             metadata = {
-                'num_sheets': len(df),
+                'num_sheets': len(sheet_info),
                 'total_rows': total_rows,
                 'sheet_info': sheet_info
             }
@@ -223,10 +502,10 @@ class DocumentProcessor:
             return {
                 'extracted_text': extracted_text,
                 'metadata': metadata,
-                'word_count': len(extracted_text.split()),
+                'word_count': word_count,
                 'char_count': len(extracted_text)
             }
-            
+
         except Exception as e:
             logger.error(f"Excel processing failed: {e}")
             raise
@@ -247,7 +526,7 @@ class DocumentProcessor:
             return {
                 'extracted_text': extracted_text,
                 'metadata': metadata,
-                'word_count': len(extracted_text.split()),
+                'word_count': _word_count(extracted_text),
                 'char_count': len(extracted_text)
             }
             
@@ -258,22 +537,18 @@ class DocumentProcessor:
     async def _process_csv(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process CSV document"""
         try:
-            df = pd.read_csv(file_path)
-            
-            # Convert to text representation
-            extracted_text = df.to_string(index=False)
-            
-            metadata = {
-                'num_rows': len(df),
-                'num_columns': len(df.columns),
-                'column_names': list(df.columns),
-                'data_types': {col: str(dtype) for col, dtype in df.dtypes.items()}
-            }
+            # The source is already text - serve it verbatim instead of
+            # round-tripping through a DataFrame and to_string()'s O(rows)
+            # formatting pass
+            async with aiofiles.open(file_path, 'r', encoding='utf-8') as file:
+                extracted_text = await file.read()
+
+            metadata = await asyncio.to_thread(_read_csv_stats, file_path)
             
             return {
                 'extracted_text': extracted_text,
                 'metadata': metadata,
-                'word_count': len(extracted_text.split()),
+                'word_count': _word_count(extracted_text),
                 'char_count': len(extracted_text)
             }
             
@@ -284,25 +559,22 @@ class DocumentProcessor:
     async def _process_image(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process image document"""
         try:
-            with Image.open(file_path) as img:
-                metadata = {
-                    'format': img.format,
-                    'mode': img.mode,
-                    'size': img.size,
-                    'width': img.width,
-                    'height': img.height
-                }
-                
-                # For now, images don't have extractable text (would need OCR)
-                extracted_text = f"Image file: {filename} ({img.format}, {img.size[0]}x{img.size[1]})"
-                
-                return {
-                    'extracted_text': extracted_text,
-                    'metadata': metadata,
-                    'word_count': len(extracted_text.split()),
-                    'char_count': len(extracted_text)
-                }
-                
+            # Decoding the image header is blocking I/O - run it off-loop
+            metadata = await asyncio.to_thread(_read_image_metadata, file_path)
+
+            # For now, images don't have extractable text (would need OCR)
+            extracted_text = (
+                f"Image file: {filename} ({metadata['format']}, "
+                f"{metadata['width']}x{metadata['height']})"
+            )
+
+            return {
+                'extracted_text': extracted_text,
+                'metadata': metadata,
+                'word_count': _word_count(extracted_text),
+                'char_count': len(extracted_text)
+            }
+
         except Exception as e:
             logger.error(f"Image processing failed: {e}")
             raise
@@ -310,9 +582,11 @@ class DocumentProcessor:
     def get_file_type(self, file_content: bytes, filename: str) -> str:
         """Detect file MIME type from content and filename"""
         try:
-            # Try to detect from file content
-            mime_type = magic.from_buffer(file_content, mime=True)
-            
+            # Try to detect from file content - libmagic only inspects the
+            # first few KB, so the slice avoids copying a large upload into
+            # the C layer
+            mime_type = _get_magic().from_buffer(file_content[:8192])
+
             # Fallback to filename extension
             if mime_type == 'application/octet-stream':
                 mime_type, _ = mimetypes.guess_type(filename)
@@ -2,19 +2,117 @@
 Supabase client service for database operations and file storage
 """
 
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union
 from supabase import create_client, Client
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Table names bound once at import - settings is frozen, so these can never
+# drift, and the query builders skip the LOAD_GLOBAL + LOAD_ATTR chain
+_DOCUMENTS_TABLE = settings.documents_table
+_CHAT_HISTORY_TABLE = settings.chat_history_table
+
+# Document rows are immutable once processed, so cached reads can live this long
+_DOC_CACHE_TTL = 3600
+
+# Chat inserts flush as one batch once this many rows queue up or the window
+# elapses, whichever comes first
+_CHAT_FLUSH_MAX_ROWS = 20
+_CHAT_FLUSH_WINDOW = 0.1
+
+def _pg_row_to_document(row) -> Dict[str, Any]:
+    """Normalize an asyncpg record to the dict shape the REST client returns"""
+    doc = dict(row)
+    if isinstance(doc.get("metadata"), str):
+        doc["metadata"] = json.loads(doc["metadata"])
+    if doc.get("id") is not None:
+        doc["id"] = str(doc["id"])
+    created_at = doc.get("created_at")
+    if created_at is not None and not isinstance(created_at, str):
+        doc["created_at"] = created_at.isoformat()
+    return doc
+
 class SupabaseService:
     """Service class for Supabase operations"""
-    
+
+    # Shared asyncpg pool for the hottest CRUD queries. Created lazily on
+    # first use and only when a direct Postgres DSN is configured; everything
+    # else keeps going through the REST client.
+    _pg_pool = None
+    _pg_pool_disabled = False
+
+    # Shared Redis client fronting document reads. Same lazy/optional pattern
+    # as the asyncpg pool: only used when redis_url is configured.
+    _redis = None
+    _redis_disabled = False
+
     def __init__(self):
         self.client: Optional[Client] = None
+        # Chat inserts are coalesced into batches by a background drainer;
+        # both start lazily on the first save so no event loop is needed here
+        self._chat_queue: Optional[asyncio.Queue] = None
+        self._chat_flush_task: Optional[asyncio.Task] = None
         self._initialize_client()
+
+    async def _get_pg_pool(self):
+        """Return the shared asyncpg pool, or None if unavailable"""
+        if SupabaseService._pg_pool_disabled or not settings.postgres_dsn:
+            return None
+
+        if SupabaseService._pg_pool is None:
+            try:
+                import asyncpg
+
+                SupabaseService._pg_pool = await asyncpg.create_pool(
+                    settings.postgres_dsn,
+                    min_size=2,
+                    max_size=10,
+                    max_queries=50_000,
+                    max_inactive_connection_lifetime=300,
+                    # Supavisor/pgbouncer in transaction mode cannot reuse
+                    # prepared statements across connections
+                    statement_cache_size=0
+                )
+                logger.info("✅ asyncpg pool initialized for hot CRUD paths")
+            except Exception as e:
+                logger.warning(f"asyncpg pool unavailable, using REST client only: {e}")
+                SupabaseService._pg_pool_disabled = True
+                return None
+
+        return SupabaseService._pg_pool
+
+    async def _get_redis(self):
+        """Return the shared Redis client, or None if unavailable"""
+        if SupabaseService._redis_disabled or not settings.redis_url:
+            return None
+
+        if SupabaseService._redis is None:
+            try:
+                import redis.asyncio as aioredis
+
+                SupabaseService._redis = aioredis.from_url(settings.redis_url)
+                logger.info("✅ Redis document cache initialized")
+            except Exception as e:
+                logger.warning(f"Redis cache unavailable, reads go to the database: {e}")
+                SupabaseService._redis_disabled = True
+                return None
+
+        return SupabaseService._redis
+
+    async def _invalidate_doc_cache(self, document_id: str):
+        """Drop a document's cached row after a write"""
+        redis_client = await self._get_redis()
+        if redis_client is None:
+            return
+        try:
+            await redis_client.delete(f"doc:{document_id}")
+        except Exception as e:
+            logger.warning(f"Redis invalidation failed for doc:{document_id}: {e}")
     
     def _initialize_client(self):
         """Initialize Supabase client"""
@@ -28,31 +126,38 @@ class SupabaseService:
             logger.error(f"Failed to initialize Supabase client: {e}")
             raise
     
-    async def upload_file(self, file_path: str, file_data: bytes, bucket: str = "documents") -> str:
+    async def upload_file(self, file_path: str, file_data: Union[bytes, str],
+                          bucket: str = "documents") -> str:
         """
         Upload file to Supabase storage
-        
+
         Args:
             file_path: Path where file should be stored
-            file_data: File content as bytes
+            file_data: File content as bytes, or a path to a file on disk -
+                the storage SDK streams a path itself, so callers that
+                already hold the content in a temp file avoid materializing
+                a second in-memory copy
             bucket: Storage bucket name
-        
+
         Returns:
             Public URL of uploaded file
         """
         try:
-            # Upload file to storage
-            result = self.client.storage.from_(bucket).upload(
+            # The storage SDK call is synchronous - run it in a thread so a
+            # multi-MB upload doesn't stall every other request on the loop
+            storage = self.client.storage.from_(bucket)
+            result = await asyncio.to_thread(
+                storage.upload,
                 path=file_path,
                 file=file_data,
                 file_options={"content-type": "application/octet-stream"}
             )
-            
+
             if result.error:
                 raise Exception(f"Upload failed: {result.error}")
-            
-            # Get public URL
-            public_url = self.client.storage.from_(bucket).get_public_url(file_path)
+
+            # Get public URL (local string formatting, no network call)
+            public_url = storage.get_public_url(file_path)
             
             logger.info(f"File uploaded successfully: {file_path}")
             return public_url
@@ -61,14 +166,15 @@ class SupabaseService:
             logger.error(f"File upload failed: {e}")
             raise
     
-    async def upload_raw_document(self, file_path: str, file_data: bytes) -> str:
+    async def upload_raw_document(self, file_path: str, file_data: Union[bytes, str]) -> str:
         """
         Upload raw document to RAW bucket
-        
+
         Args:
             file_path: Path where file should be stored
-            file_data: File content as bytes
-        
+            file_data: File content as bytes or a path to a file on disk
+                (see upload_file)
+
         Returns:
             Public URL of uploaded file
         """
@@ -90,7 +196,7 @@ class SupabaseService:
             Saved document record
         """
         try:
-            result = self.client.table(settings.documents_table).insert(document_data).execute()
+            result = self.client.table(_DOCUMENTS_TABLE).insert(document_data).execute()
             
             if result.data:
                 logger.info(f"Document metadata saved: {document_data.get('name')}")
@@ -102,22 +208,49 @@ class SupabaseService:
             logger.error(f"Failed to save document metadata: {e}")
             raise
     
-    async def get_documents(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def update_document(self, document_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Update fields on a document record
+
+        Args:
+            document_id: Document ID
+            updates: Column/value pairs to update
+
+        Returns:
+            Updated document record or None
+        """
+        try:
+            result = self.client.table(_DOCUMENTS_TABLE).update(updates).eq("id", document_id).execute()
+
+            await self._invalidate_doc_cache(document_id)
+
+            return result.data[0] if result.data else None
+
+        except Exception as e:
+            logger.error(f"Failed to update document {document_id}: {e}")
+            raise
+
+    async def get_documents(self, user_id: Optional[str] = None, require_markdown: bool = False) -> List[Dict[str, Any]]:
         """
         Retrieve documents from database
-        
+
         Args:
             user_id: Filter by user ID (optional)
-        
+            require_markdown: Only return documents with consolidated_markdown
+
         Returns:
             List of document records
         """
         try:
-            query = self.client.table(settings.documents_table).select("*")
-            
+            query = self.client.table(_DOCUMENTS_TABLE).select("*")
+
             if user_id:
                 query = query.eq("user_id", user_id)
-            
+
+            if require_markdown:
+                # Filter server-side so only the one usable row crosses the wire
+                query = query.not_.is_("consolidated_markdown", "null").limit(1)
+
             result = query.execute()
             
             return result.data or []
@@ -126,6 +259,53 @@ class SupabaseService:
             logger.error(f"Failed to retrieve documents: {e}")
             raise
     
+    async def get_document_summaries(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Retrieve a page of document list rows with a short extracted_text preview
+
+        Queries the documents_list_view so only the projected columns and a
+        200-char preview cross the wire, paginated server-side with an exact
+        total count.
+
+        Args:
+            user_id: Filter by user ID (optional)
+            limit: Page size
+            offset: Page start
+
+        Returns:
+            Tuple of (document summary records, total matching count)
+        """
+        try:
+            # Only the columns the list view actually renders - metadata and
+            # upload_url stay behind the get-by-id path
+            query = self.client.table("documents_list_view").select(
+                "id,user_id,name,size,mime_type,status,preview,created_at", count="exact"
+            )
+
+            if user_id:
+                query = query.eq("user_id", user_id)
+
+            result = query.order("created_at", desc=True)\
+                .range(offset, offset + limit - 1)\
+                .execute()
+
+            return result.data or [], result.count or 0
+
+        except Exception as e:
+            logger.warning(f"documents_list_view unavailable, falling back to full rows: {e}")
+            documents = await self.get_documents(user_id)
+            total = len(documents)
+            page = documents[offset:offset + limit]
+            for doc in page:
+                text = doc.get("extracted_text") or ""
+                doc["preview"] = text[:200]
+            return page, total
+
     async def get_document_by_id(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Get specific document by ID
@@ -136,14 +316,52 @@ class SupabaseService:
         Returns:
             Document record or None
         """
-        try:
-            result = self.client.table(settings.documents_table).select("*").eq("id", document_id).execute()
-            
-            return result.data[0] if result.data else None
-            
-        except Exception as e:
-            logger.error(f"Failed to retrieve document {document_id}: {e}")
-            raise
+        # Cache hit skips the database entirely - processed documents are
+        # immutable, so staleness is bounded by explicit invalidation on writes
+        redis_client = await self._get_redis()
+        if redis_client is not None:
+            try:
+                cached = await redis_client.get(f"doc:{document_id}")
+                if cached:
+                    return json.loads(cached)
+            except Exception as e:
+                logger.warning(f"Redis read failed for doc:{document_id}: {e}")
+
+        document = None
+
+        # Hot path: a pooled asyncpg query skips PostgREST's HTTP + JSON
+        # round-trip entirely
+        pool = await self._get_pg_pool()
+        fetched = False
+        if pool is not None:
+            try:
+                async with pool.acquire() as conn:
+                    row = await conn.fetchrow(
+                        f"SELECT * FROM {_DOCUMENTS_TABLE} WHERE id = $1",
+                        document_id
+                    )
+                document = _pg_row_to_document(row) if row else None
+                fetched = True
+            except Exception as e:
+                logger.warning(f"asyncpg lookup failed, falling back to REST: {e}")
+
+        if not fetched:
+            try:
+                result = self.client.table(_DOCUMENTS_TABLE).select("*").eq("id", document_id).execute()
+
+                document = result.data[0] if result.data else None
+
+            except Exception as e:
+                logger.error(f"Failed to retrieve document {document_id}: {e}")
+                raise
+
+        if redis_client is not None and document:
+            try:
+                await redis_client.set(f"doc:{document_id}", json.dumps(document), ex=_DOC_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Redis write failed for doc:{document_id}: {e}")
+
+        return document
     
     async def delete_document(self, document_id: str) -> bool:
         """
@@ -155,26 +373,158 @@ class SupabaseService:
         Returns:
             Success status
         """
+        # Hot path: one DELETE ... RETURNING replaces the fetch-then-delete
+        # pair of round-trips
+        pool = await self._get_pg_pool()
+        if pool is not None:
+            try:
+                async with pool.acquire() as conn:
+                    row = await conn.fetchrow(
+                        f"DELETE FROM {_DOCUMENTS_TABLE} WHERE id = $1 RETURNING file_path",
+                        document_id
+                    )
+                if row is None:
+                    return False
+                if row["file_path"]:
+                    self.client.storage.from_("documents").remove([row["file_path"]])
+                await self._invalidate_doc_cache(document_id)
+                logger.info(f"Document deleted: {document_id}")
+                return True
+            except Exception as e:
+                logger.warning(f"asyncpg delete failed, falling back to REST: {e}")
+
         try:
             # Get document record first
             document = await self.get_document_by_id(document_id)
             if not document:
                 return False
-            
+
             # Delete file from storage
             if document.get("file_path"):
                 self.client.storage.from_("documents").remove([document["file_path"]])
-            
+
             # Delete metadata from database
-            result = self.client.table(settings.documents_table).delete().eq("id", document_id).execute()
-            
+            result = self.client.table(_DOCUMENTS_TABLE).delete().eq("id", document_id).execute()
+
+            await self._invalidate_doc_cache(document_id)
             logger.info(f"Document deleted: {document_id}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to delete document {document_id}: {e}")
             raise
     
+    async def delete_document_owned(self, document_id: str, user_id: str) -> bool:
+        """
+        Delete a document only if it belongs to the given user, in one query
+
+        The ownership check rides along in the DELETE's WHERE clause instead
+        of a separate fetch, halving round-trips on the happy path.
+
+        Args:
+            document_id: Document ID
+            user_id: Owning user ID
+
+        Returns:
+            True if a row was deleted
+        """
+        pool = await self._get_pg_pool()
+        if pool is not None:
+            try:
+                async with pool.acquire() as conn:
+                    row = await conn.fetchrow(
+                        f"DELETE FROM {_DOCUMENTS_TABLE} WHERE id = $1 AND user_id = $2 RETURNING file_path",
+                        document_id,
+                        user_id
+                    )
+                if row is None:
+                    return False
+                if row["file_path"]:
+                    self.client.storage.from_("documents").remove([row["file_path"]])
+                await self._invalidate_doc_cache(document_id)
+                logger.info(f"Document deleted: {document_id}")
+                return True
+            except Exception as e:
+                logger.warning(f"asyncpg delete failed, falling back to REST: {e}")
+
+        try:
+            result = self.client.table(_DOCUMENTS_TABLE).delete().eq("id", document_id).eq("user_id", user_id).execute()
+
+            if not result.data:
+                return False
+
+            for row in result.data:
+                if row.get("file_path"):
+                    self.client.storage.from_("documents").remove([row["file_path"]])
+
+            await self._invalidate_doc_cache(document_id)
+            logger.info(f"Document deleted: {document_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to delete document {document_id}: {e}")
+            raise
+
+    async def document_exists(self, document_id: str) -> bool:
+        """
+        Cheap existence probe, used to pick 404 vs 403 on a delete miss
+
+        Args:
+            document_id: Document ID
+
+        Returns:
+            True if a document with this ID exists
+        """
+        try:
+            result = self.client.table(_DOCUMENTS_TABLE).select("id").eq("id", document_id).limit(1).execute()
+
+            return bool(result.data)
+
+        except Exception as e:
+            logger.error(f"Failed to check document {document_id}: {e}")
+            raise
+
+    async def get_document_fingerprint(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up cached processing results by content hash
+
+        Args:
+            sha256: Hex digest of the file content
+
+        Returns:
+            Cached fingerprint record or None
+        """
+        try:
+            result = self.client.table("document_fingerprints").select("*").eq("sha256", sha256).execute()
+
+            return result.data[0] if result.data else None
+
+        except Exception as e:
+            logger.warning(f"Fingerprint lookup failed for {sha256[:12]}: {e}")
+            return None
+
+    async def save_document_fingerprint(self, sha256: str, processing_result: Dict[str, Any]) -> None:
+        """
+        Cache processing results by content hash for duplicate-upload reuse
+
+        Args:
+            sha256: Hex digest of the file content
+            processing_result: Output of the document processing pipeline
+        """
+        try:
+            self.client.table("document_fingerprints").upsert({
+                "sha256": sha256,
+                "extracted_text": processing_result.get("extracted_text", ""),
+                "consolidated_markdown": processing_result.get("consolidated_markdown"),
+                "metadata": processing_result.get("metadata", {}),
+                "processing_method": processing_result.get("processing_method", "unknown")
+            }, on_conflict="sha256").execute()
+
+            logger.info(f"Fingerprint cached: {sha256[:12]}")
+
+        except Exception as e:
+            logger.warning(f"Failed to cache fingerprint {sha256[:12]}: {e}")
+
     async def create_new_chat_session(self) -> Dict[str, Any]:
         """Create a new chat session"""
         try:
@@ -186,7 +536,7 @@ class SupabaseService:
                 "model_output": "Welcome! I'm ready to help you with your documents. Please upload a PDF to get started."
             }
             
-            result = self.client.table(settings.chat_history_table).insert(chat_session_data).execute()
+            result = self.client.table(_CHAT_HISTORY_TABLE).insert(chat_session_data).execute()
             
             if result.data:
                 logger.info(f"New chat session created: {chat_session_data['chat_id']}")
@@ -198,8 +548,59 @@ class SupabaseService:
             logger.error(f"Failed to create chat session: {e}")
             raise
 
+    def _enqueue_chat_row(self, chat_data: Dict[str, Any]) -> "asyncio.Future":
+        """Queue one chat row for the batch drainer, returning its future"""
+        loop = asyncio.get_running_loop()
+        if self._chat_queue is None:
+            self._chat_queue = asyncio.Queue()
+        if self._chat_flush_task is None or self._chat_flush_task.done():
+            self._chat_flush_task = loop.create_task(self._chat_flush_loop())
+
+        future = loop.create_future()
+        self._chat_queue.put_nowait((chat_data, future))
+        return future
+
+    async def _chat_flush_loop(self):
+        """Drain queued chat rows into batched inserts.
+
+        Waits up to _CHAT_FLUSH_WINDOW after the first row (or until
+        _CHAT_FLUSH_MAX_ROWS accumulate) so rapid exchanges collapse from N
+        individual round-trips into one batch POST.
+        """
+        while True:
+            batch = [await self._chat_queue.get()]
+            deadline = asyncio.get_running_loop().time() + _CHAT_FLUSH_WINDOW
+            while len(batch) < _CHAT_FLUSH_MAX_ROWS:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._chat_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            rows = [chat_data for chat_data, _ in batch]
+            try:
+                # The sync client call runs in a thread so the drainer never
+                # blocks the event loop
+                result = await asyncio.to_thread(
+                    self.client.table(_CHAT_HISTORY_TABLE).insert(rows).execute
+                )
+                saved_rows = result.data or []
+                for (_, future), saved in zip(batch, saved_rows + [None] * (len(batch) - len(saved_rows))):
+                    if not future.done():
+                        future.set_result(saved)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
     async def save_chat_interaction(self, user_input: str, model_output: str, chat_id: str) -> Dict[str, Any]:
-        """Save chat interaction to chat_history table with chat_id"""
+        """Save chat interaction to chat_history table with chat_id
+
+        Rows are coalesced by the batch drainer; the awaited future resolves
+        to this row once its batch lands.
+        """
         try:
             chat_data = {
                 "chat_id": chat_id,
@@ -207,33 +608,93 @@ class SupabaseService:
                 "model_output": model_output
                 # created_at will be auto-generated by the database default
             }
-            
-            result = self.client.table(settings.chat_history_table).insert(chat_data).execute()
-            
-            if result.data:
+
+            saved = await self._enqueue_chat_row(chat_data)
+
+            if saved:
                 logger.info(f"Chat interaction saved successfully for chat_id: {chat_id}")
-                return result.data[0]
+                return saved
             else:
                 raise Exception("Failed to save chat interaction")
-                
+
         except Exception as e:
             logger.error(f"Failed to save chat interaction: {e}")
             raise
     
-    async def get_chat_history(self, chat_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get chat history for a specific chat session or recent chats"""
+    async def append_and_return_recent(
+        self,
+        chat_id: str,
+        user_input: str,
+        model_output: str,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert a chat interaction and return the trailing history window
+        (newest first) in a single RPC round-trip
+
+        Falls back to a plain insert if the database function is missing.
+        """
         try:
-            query = self.client.table(settings.chat_history_table).select("*")
-            
+            result = self.client.rpc("append_and_return_recent", {
+                "p_chat_id": chat_id,
+                "p_user_input": user_input,
+                "p_model_output": model_output,
+                "p_limit": limit
+            }).execute()
+
+            if result.data:
+                return result.data
+            else:
+                raise Exception("append_and_return_recent returned no rows")
+
+        except Exception as e:
+            logger.warning(f"append_and_return_recent RPC unavailable, falling back to insert: {e}")
+            saved = await self.save_chat_interaction(
+                user_input=user_input,
+                model_output=model_output,
+                chat_id=chat_id
+            )
+            # Return the real trailing window, not just the inserted row -
+            # callers seed their history cache from this result, and a
+            # one-row window would shadow the rest of the conversation
+            try:
+                result = self.client.table(_CHAT_HISTORY_TABLE) \
+                    .select("*") \
+                    .eq("chat_id", chat_id) \
+                    .order("created_at", desc=True) \
+                    .limit(limit) \
+                    .execute()
+                if result.data:
+                    return result.data
+            except Exception as window_error:
+                logger.warning(f"Failed to fetch trailing history window: {window_error}")
+            return [saved]
+
+    async def get_chat_history(self, chat_id: Optional[str] = None, limit: int = 50,
+                               after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get chat history for a specific chat session or recent chats
+
+        `after` is a keyset cursor - the created_at of the last row the
+        caller already has. Rows strictly newer than it are returned, so
+        long sessions page through the (chat_id, created_at) index with a
+        bounded scan instead of OFFSET re-reading skipped rows. The cursor
+        for the next page is the last row's created_at.
+        """
+        try:
+            query = self.client.table(_CHAT_HISTORY_TABLE).select("*")
+
             if chat_id:
                 # Get messages for specific chat session
                 query = query.eq("chat_id", chat_id)
             else:
                 # Filter out null chat_ids when no specific chat_id provided
                 query = query.not_.is_("chat_id", "null")
-                
+
+            if after:
+                query = query.gt("created_at", after)
+
             result = query.order("created_at", desc=False).limit(limit).execute()
-            
+
             return result.data or []
             
         except Exception as e:
@@ -241,55 +702,62 @@ class SupabaseService:
             raise
 
     async def get_chat_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """Get list of chat sessions with their latest messages"""
+        """Get list of chat sessions with their latest messages
+
+        The get_chat_sessions RPC aggregates the latest message and count per
+        session server-side in one round-trip, replacing the old pattern of
+        fetching every history row plus one count query per session.
+        """
+        try:
+            result = self.client.rpc("get_chat_sessions", {"p_limit": limit}).execute()
+
+            return [
+                {
+                    'chat_id': row['chat_id'],
+                    'title': self._generate_chat_title(row['user_input'], row['model_output']),
+                    'last_message': row['last_message'],
+                    'message_count': row['message_count'] or 0,
+                    'preview': row['user_input'][:50] + '...' if len(row['user_input']) > 50 else row['user_input']
+                }
+                for row in (result.data or [])
+            ]
+
+        except Exception as e:
+            logger.warning(f"get_chat_sessions RPC unavailable, falling back to client-side grouping: {e}")
+            return await self._get_chat_sessions_fallback(limit)
+
+    async def _get_chat_sessions_fallback(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Group sessions client-side when the RPC migration isn't applied yet"""
         try:
-            # Get unique chat sessions with their latest message, filter out NULL chat_ids
-            result = self.client.table(settings.chat_history_table)\
+            result = self.client.table(_CHAT_HISTORY_TABLE)\
                 .select("chat_id, user_input, model_output, created_at")\
                 .not_.is_("chat_id", "null")\
                 .order("created_at", desc=True)\
                 .execute()
-            
-            if not result.data:
-                return []
-            
-            # Group by chat_id and get latest message for each session
+
+            # Rows arrive newest first, so the first row per chat_id is the
+            # session head; counts come from the same result set instead of
+            # one extra query per session
             sessions = {}
-            for row in result.data:
+            for row in result.data or []:
                 chat_id = row['chat_id']
-                
-                # Skip if chat_id is None or empty
                 if not chat_id:
                     continue
-                    
-                if chat_id not in sessions:
-                    # Get message count for this session
-                    try:
-                        count_result = self.client.table(settings.chat_history_table)\
-                            .select("id", count="exact")\
-                            .eq("chat_id", chat_id)\
-                            .execute()
-                        
-                        message_count = count_result.count or 0
-                        
-                        # Create session summary
-                        sessions[chat_id] = {
-                            'chat_id': chat_id,
-                            'title': self._generate_chat_title(row['user_input'], row['model_output']),
-                            'last_message': row['created_at'],
-                            'message_count': message_count,
-                            'preview': row['user_input'][:50] + '...' if len(row['user_input']) > 50 else row['user_input']
-                        }
-                    except Exception as e:
-                        logger.warning(f"Error processing session {chat_id}: {e}")
-                        continue
-            
-            # Return sessions sorted by last message time
-            session_list = list(sessions.values())
-            session_list.sort(key=lambda x: x['last_message'], reverse=True)
-            
-            return session_list[:limit]
-            
+
+                if chat_id in sessions:
+                    sessions[chat_id]['message_count'] += 1
+                else:
+                    sessions[chat_id] = {
+                        'chat_id': chat_id,
+                        'title': self._generate_chat_title(row['user_input'], row['model_output']),
+                        'last_message': row['created_at'],
+                        'message_count': 1,
+                        'preview': row['user_input'][:50] + '...' if len(row['user_input']) > 50 else row['user_input']
+                    }
+
+            # Insertion order already follows last_message descending
+            return list(sessions.values())[:limit]
+
         except Exception as e:
             logger.error(f"Failed to retrieve chat sessions: {e}")
             raise
@@ -308,12 +776,7 @@ class SupabaseService:
             
         return title or "Untitled Chat"
 
-# Global service instance
-_supabase_service = None
-
+@lru_cache(maxsize=1)
 def get_supabase_client() -> SupabaseService:
-    """Get Supabase service instance (singleton)"""
-    global _supabase_service
-    if _supabase_service is None:
-        _supabase_service = SupabaseService()
-    return _supabase_service
\ No newline at end of file
+    """Get Supabase service instance (singleton, cached in C by lru_cache)"""
+    return SupabaseService()
\ No newline at end of file
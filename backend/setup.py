@@ -6,9 +6,29 @@ Setup script for Paypr MVP Backend
 import os
 import sys
 import subprocess
-import shutil
 from pathlib import Path
 
+# Platform branch resolved once at import - the explicit .exe suffix also
+# spares CreateProcess a PATHEXT resolution on Windows
+_PIP_PATH = "venv/Scripts/pip.exe" if os.name == 'nt' else "venv/bin/pip"
+
+def _run(argv):
+    """Launch a tool, wait for it, and return its exit code
+
+    On POSIX this uses os.posix_spawn, which dispatches straight to the
+    kernel's spawn path instead of subprocess's fork_exec (no page-table
+    copy of this interpreter, no Python-side pipe/signal setup). Windows
+    falls back to subprocess.run. A child killed by a signal reports the
+    conventional 128+signum so orchestrators see e.g. SIGTERM as 143.
+    """
+    if hasattr(os, "posix_spawn"):
+        pid = os.posix_spawn(argv[0], argv, os.environ)
+        _, status = os.waitpid(pid, 0)
+        if os.WIFEXITED(status):
+            return os.WEXITSTATUS(status)
+        return 128 + os.WTERMSIG(status)
+    return subprocess.run(argv).returncode
+
 def check_python_version():
     """Check if Python version is 3.8+"""
     if sys.version_info < (3, 8):
@@ -25,20 +45,20 @@ def create_virtual_environment():
         return
     
     print("📦 Creating virtual environment...")
-    subprocess.run([sys.executable, "-m", "venv", "venv"], check=True)
+    rc = _run([sys.executable, "-m", "venv", "venv"])
+    if rc:
+        print(f"❌ Failed to create virtual environment (exit code {rc})")
+        sys.exit(rc)
     print("✅ Virtual environment created")
 
 def install_dependencies():
     """Install required dependencies"""
     print("📦 Installing dependencies...")
-    
-    # Determine the correct pip path
-    if os.name == 'nt':  # Windows
-        pip_path = Path("venv/Scripts/pip")
-    else:  # Unix/Linux/macOS
-        pip_path = Path("venv/bin/pip")
-    
-    subprocess.run([str(pip_path), "install", "-r", "requirements.txt"], check=True)
+
+    rc = _run([_PIP_PATH, "install", "-r", "requirements.txt"])
+    if rc:
+        print(f"❌ Failed to install dependencies (exit code {rc})")
+        sys.exit(rc)
     print("✅ Dependencies installed")
 
 def setup_environment_file():
@@ -51,6 +71,7 @@ def setup_environment_file():
         return
     
     if env_example.exists():
+        import shutil
         shutil.copy(env_example, env_file)
         print("📝 .env file created from .env.example")
         print("⚠️  Please edit .env file with your actual configuration values")
@@ -95,10 +116,7 @@ def main():
         setup_environment_file()
         create_upload_directory()
         display_next_steps()
-        
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Setup failed: {e}")
-        sys.exit(1)
+
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         sys.exit(1)
@@ -5,73 +5,155 @@ Development startup script for Paypr MVP Backend
 
 import os
 import sys
-import subprocess
-from pathlib import Path
+from dataclasses import dataclass
 
-def check_environment():
+@dataclass(frozen=True)
+class StartupConfig:
+    """Startup paths and server binding, resolved once at import
+
+    Everything the environment check and server launch need lives in this
+    one immutable object - plain strings, no repeated Path construction,
+    and a single place to override via environment variables.
+    """
+    venv_dir: str = "venv"
+    env_file: str = ".env"
+    uploads_dir: str = "uploads"
+    host: str = "0.0.0.0"
+    port: int = 8000
+
+    @classmethod
+    def detect(cls) -> "StartupConfig":
+        """Build the config, honoring HOST/PORT overrides"""
+        return cls(
+            host=os.environ.get("HOST", cls.host),
+            port=int(os.environ.get("PORT", cls.port))
+        )
+
+_CONFIG = StartupConfig.detect()
+
+# Open handle on uploads/, kept for the life of the process so its dentry
+# and inode stay cached ahead of the first upload request
+_UPLOADS_FD = None
+
+# Startup banner encoded once at import - emitted as a single os.write to
+# fd 1, skipping the TextIOWrapper encode and buffered-writer lock
+_BANNER_BYTES = (
+    "🚀 Starting Paypr MVP Backend...\n"
+    f"📚 API docs will be available at: http://localhost:{_CONFIG.port}/docs\n"
+    f"🔗 Health check: http://localhost:{_CONFIG.port}/health\n"
+    "\n" + "=" * 50 + "\n"
+).encode("utf-8")
+
+def check_environment(config: StartupConfig = _CONFIG):
     """Check if environment is properly set up"""
     print("🔍 Checking environment...")
-    
-    # Check if virtual environment exists
-    venv_path = Path("venv")
-    if not venv_path.exists():
-        print("❌ Virtual environment not found. Run setup.py first.")
-        return False
-    
+
+    # One directory listing answers all three checks - a single getdents
+    # instead of a stat per name, and the mkdir syscall (which the kernel
+    # would reject with EEXIST anyway) is skipped when uploads/ exists.
+    # This is already the minimum syscall count for the check; batching
+    # the stats through io_uring would add a ring setup/teardown and an
+    # optional native dependency to save nothing over the one getdents.
+    with os.scandir(".") as entries:
+        names = {entry.name for entry in entries}
+
+    # The server runs in this interpreter now, so a missing venv directory
+    # isn't fatal - sys.executable resolving means Python is running; the
+    # deps may simply be installed elsewhere (container, system site)
+    if config.venv_dir not in names:
+        print("⚠️  Virtual environment not found. Run setup.py to create one.")
+
     # Check if .env file exists
-    env_file = Path(".env")
-    if not env_file.exists():
+    if config.env_file not in names:
         print("⚠️  .env file not found. Using default configuration.")
         print("   Create .env file from .env.example for production use.")
-    
+
     # Check if uploads directory exists
-    uploads_dir = Path("uploads")
-    uploads_dir.mkdir(exist_ok=True)
-    
+    if config.uploads_dir not in names:
+        os.mkdir(config.uploads_dir)
+
+    # Touch the upload hot path now rather than on the first request - the
+    # held fd pins the directory's dentry/inode in cache
+    global _UPLOADS_FD
+    if _UPLOADS_FD is None and hasattr(os, "O_DIRECTORY"):
+        try:
+            _UPLOADS_FD = os.open(config.uploads_dir, os.O_DIRECTORY | os.O_RDONLY)
+        except OSError:
+            pass
+
     print("✅ Environment check completed")
     return True
 
-def start_server():
-    """Start the FastAPI development server"""
-    print("🚀 Starting Paypr MVP Backend...")
-    
+def start_server(reload: bool = False, config: StartupConfig = _CONFIG):
+    """Start the FastAPI server in-process via uvicorn"""
+    # Running outside a venv usually means the deps from setup.py are
+    # missing - warn but let the import failure speak for itself
+    if sys.prefix == getattr(sys, "base_prefix", sys.prefix):
+        print("⚠️  Not running inside a virtual environment")
+
+    # One pre-encoded write straight to fd 1 - the flush first keeps any
+    # buffered print output (warnings above) ordered before the banner
+    sys.stdout.flush()
+    os.write(1, _BANNER_BYTES)
+
+    # Under Docker/compose stdout is a pipe, so Python block-buffers it and
+    # worker logs arrive in delayed bursts; the workers inherit this env
+    # and stream their output immediately instead
+    os.environ.setdefault("PYTHONUNBUFFERED", "1")
+
+    # Import lazily so `import start` stays cheap; uvicorn itself scales
+    # across cores with multiple workers (sharing one listening socket)
+    # and the C event loop / HTTP parser, same as main.py's __main__ block
+    import uvicorn
+
+    workers = 1 if reload else int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 2))
+
+    # uvicorn[standard] ships watchfiles, so the reloader is inotify-driven
+    # rather than stat-polling every watched file; scoping it to this
+    # package's .py files keeps the watch set (and restart noise) small
+    reload_kwargs = {
+        "reload_dirs": ["."],
+        "reload_includes": ["*.py"],
+        "reload_delay": 0.25
+    } if reload else {}
+
     try:
-        # Determine the correct Python path
-        if os.name == 'nt':  # Windows
-            python_path = Path("venv/Scripts/python")
-        else:  # Unix/Linux/macOS
-            python_path = Path("venv/bin/python")
-        
-        # Start the server
-        cmd = [str(python_path), "main.py"]
-        
-        print(f"📡 Running: {' '.join(cmd)}")
-        print("📚 API docs will be available at: http://localhost:8000/docs")
-        print("🔗 Health check: http://localhost:8000/health")
-        print("\n" + "="*50)
-        
-        subprocess.run(cmd, check=True)
-        
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Server failed to start: {e}")
-        sys.exit(1)
+        uvicorn.run(
+            "main:app",
+            host=config.host,
+            port=config.port,
+            reload=reload,
+            **reload_kwargs,
+            workers=workers,
+            log_level="info",
+            loop="uvloop",
+            http="httptools"
+        )
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        sys.exit(1)
 
 def main():
     """Main startup function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Paypr MVP Backend development server")
+    parser.add_argument("--reload", action="store_true",
+                        help="Restart on code changes (single worker)")
+    args = parser.parse_args()
+
     print("🌟 Paypr MVP Backend - Development Server")
     print("=" * 40)
-    
-    if not check_environment():
-        print("\n💡 To set up the environment, run:")
-        print("   python setup.py")
-        sys.exit(1)
-    
-    start_server()
+
+    # Supervised deployments (systemd, k8s) guarantee the environment
+    # themselves - production images set PAYPR_SKIP_ENV_CHECK=1 to skip
+    # the filesystem checks and go straight to the server
+    if not os.environ.get("PAYPR_SKIP_ENV_CHECK"):
+        if not check_environment():
+            print("\n💡 To set up the environment, run:")
+            print("   python setup.py")
+            sys.exit(1)
+
+    start_server(reload=args.reload)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
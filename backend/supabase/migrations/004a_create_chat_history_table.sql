@@ -0,0 +1,19 @@
+-- Create chat_history table backing the chat endpoints and the
+-- append_and_return_recent (005) / get_chat_sessions (009) functions.
+-- Named 004a so it sorts between 004 and 005: 005 declares
+-- RETURNS SETOF chat_history and needs the table to exist when it runs.
+CREATE TABLE IF NOT EXISTS chat_history (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    chat_id TEXT,
+    user_input TEXT NOT NULL,
+    model_output TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Per-chat history reads are always ordered by recency; 009 adds the
+-- composite (chat_id, created_at DESC) index on top of this
+CREATE INDEX IF NOT EXISTS idx_chat_history_created_at ON chat_history(created_at DESC);
+
+-- Grant necessary permissions
+GRANT ALL ON chat_history TO authenticated;
+GRANT ALL ON chat_history TO service_role;
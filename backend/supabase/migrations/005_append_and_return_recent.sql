@@ -0,0 +1,26 @@
+-- Create function to append a chat interaction and return the trailing
+-- history window in a single round-trip (used by the chat message endpoint
+-- instead of separate insert + select calls)
+CREATE OR REPLACE FUNCTION append_and_return_recent(
+    p_chat_id TEXT,
+    p_user_input TEXT,
+    p_model_output TEXT,
+    p_limit INT DEFAULT 10
+)
+RETURNS SETOF chat_history AS $$
+BEGIN
+    INSERT INTO chat_history (chat_id, user_input, model_output)
+    VALUES (p_chat_id, p_user_input, p_model_output);
+
+    RETURN QUERY
+    SELECT *
+    FROM chat_history
+    WHERE chat_id = p_chat_id
+    ORDER BY created_at DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION append_and_return_recent TO authenticated;
+GRANT EXECUTE ON FUNCTION append_and_return_recent TO service_role;
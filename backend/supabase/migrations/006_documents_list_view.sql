@@ -0,0 +1,20 @@
+-- Create a list view that projects only the columns the document list
+-- endpoint needs, with extracted_text truncated server-side so multi-MB
+-- document bodies never cross the wire for list requests
+CREATE OR REPLACE VIEW documents_list_view AS
+SELECT
+    id,
+    user_id,
+    name,
+    size,
+    mime_type,
+    status,
+    upload_url,
+    substr(extracted_text, 1, 200) AS preview,
+    metadata,
+    created_at
+FROM documents;
+
+-- Grant read access
+GRANT SELECT ON documents_list_view TO authenticated;
+GRANT SELECT ON documents_list_view TO service_role;
@@ -0,0 +1,4 @@
+-- Composite index so the paginated document list (user filter + newest
+-- first) is served by an index scan instead of a sort
+CREATE INDEX IF NOT EXISTS idx_documents_user_id_created_at
+ON documents(user_id, created_at DESC);
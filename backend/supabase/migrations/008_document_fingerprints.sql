@@ -0,0 +1,14 @@
+-- Cache of processing results keyed by content hash, so re-uploads of an
+-- identical file skip the AI pipeline entirely
+CREATE TABLE IF NOT EXISTS document_fingerprints (
+    sha256 TEXT PRIMARY KEY,
+    extracted_text TEXT,
+    consolidated_markdown TEXT,
+    metadata JSONB DEFAULT '{}',
+    processing_method TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Grant necessary permissions
+GRANT ALL ON document_fingerprints TO authenticated;
+GRANT ALL ON document_fingerprints TO service_role;
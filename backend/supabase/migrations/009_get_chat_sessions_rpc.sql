@@ -0,0 +1,47 @@
+-- Aggregate the chat session list server-side in one round-trip: latest
+-- message per chat_id plus its message count, newest session first. The
+-- sessions endpoint previously fetched every history row and then issued a
+-- count query per session.
+CREATE OR REPLACE FUNCTION get_chat_sessions(p_limit INT DEFAULT 20)
+RETURNS TABLE(
+    chat_id TEXT,
+    user_input TEXT,
+    model_output TEXT,
+    last_message TIMESTAMP WITH TIME ZONE,
+    message_count BIGINT
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH counts AS (
+        SELECT ch.chat_id, COUNT(*) AS message_count
+        FROM chat_history ch
+        WHERE ch.chat_id IS NOT NULL
+        GROUP BY ch.chat_id
+    ),
+    latest AS (
+        SELECT DISTINCT ON (ch.chat_id)
+            ch.chat_id, ch.user_input, ch.model_output, ch.created_at
+        FROM chat_history ch
+        WHERE ch.chat_id IS NOT NULL
+        ORDER BY ch.chat_id, ch.created_at DESC
+    )
+    SELECT
+        latest.chat_id,
+        latest.user_input,
+        latest.model_output,
+        latest.created_at AS last_message,
+        counts.message_count
+    FROM latest
+    JOIN counts ON counts.chat_id = latest.chat_id
+    ORDER BY latest.created_at DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Serves both the DISTINCT ON scan and per-chat history reads
+CREATE INDEX IF NOT EXISTS idx_chat_history_chat_id_created_at
+ON chat_history(chat_id, created_at DESC);
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION get_chat_sessions TO authenticated;
+GRANT EXECUTE ON FUNCTION get_chat_sessions TO service_role;